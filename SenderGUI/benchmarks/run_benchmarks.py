@@ -0,0 +1,412 @@
+"""Headless microbenchmarks for the dashboard's hot paths, stored as JSON.
+
+    python benchmarks/run_benchmarks.py [--quick] [--only map,camera] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/old.json [--threshold 0.15]
+
+Qt runs on the offscreen platform, map tiles come from a local HTTP stand-in
+and every store lives in a temporary directory, so a run needs no display,
+network or hardware and leaves the working tree alone. Each result is the
+per-call time in seconds (best / median / mean over the repeats). --compare
+reports the median of every case against an earlier results file and exits
+with status 1 when any case got slower than the threshold.
+"""
+import argparse
+import http.server
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, SRC_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+BASE_LAT = 23.83778611
+BASE_LON = 90.35948889
+
+
+def measure(fn, repeat=5, min_time=0.05, max_number=100000, setup=None):
+    """Time fn() and return per-call seconds.
+
+    Each repeat runs fn enough times to take at least min_time, so fast calls
+    are not lost in timer noise; a call that takes longer than min_time on its
+    own is run once per repeat. setup(), if given, runs untimed before every
+    repeat, for cases that consume their input; pass max_number=1 with it so
+    each repeat times exactly one call on fresh input.
+    """
+    if setup is not None:
+        setup()
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    number = 1 if first >= min_time else min(max_number, max(1, int(min_time / max(first, 1e-9))))
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def synthetic_track(count):
+    """count fixes along a slowly curving drive around the default map center"""
+    import numpy as np
+
+    t = np.arange(count, dtype=np.float64)
+    heading = t * 0.002
+    step = 1e-6
+    lats = BASE_LAT + np.cumsum(np.cos(heading)) * step
+    lons = BASE_LON + np.cumsum(np.sin(heading)) * step
+    return lats, lons, time.time() - (count - t) * 0.01
+
+
+class TileStandIn:
+    """Local HTTP tile server returning one generated PNG for every z/x/y, with optional latency"""
+
+    def __init__(self, latency=0.0):
+        import PIL.Image
+
+        buffer = io.BytesIO()
+        PIL.Image.new("RGB", (256, 256), (200, 220, 200)).save(buffer, format="PNG")
+        tile = buffer.getvalue()
+        self.requests = 0
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests += 1
+                if latency:
+                    time.sleep(latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(tile)))
+                self.end_headers()
+                self.wfile.write(tile)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="tile-stand-in", daemon=True)
+        self.thread.start()
+        self.url_template = f"http://127.0.0.1:{self.server.server_address[1]}/{{z}}/{{x}}/{{y}}.png"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def bench_parse(results, quick, workdir):
+    from telemetry_parse import make_packets
+    from utility.listen_to_udp import parse_packet
+
+    packets_per_run = 1000 if quick else 10000
+    for fmt in ("json", "csv", "binary"):
+        packets = make_packets(fmt, packets_per_run)
+
+        def parse_all():
+            for data in packets:
+                parse_packet(data)
+        timing = measure(parse_all, repeat=5)
+        # Report per packet, not per batch
+        for key in ("best", "median", "mean"):
+            timing[key] /= packets_per_run
+        timing["bytes_per_packet"] = len(packets[0])
+        results[f"parse.{fmt}"] = timing
+
+
+def bench_map(results, quick, workdir, tiles):
+    from PyQt6.QtCore import QRect
+    from PyQt6.QtGui import QImage, QPainter
+    from components.mapViewer import MapViewer
+    from utility.tile_store import TileStore
+
+    store = TileStore(os.path.join(workdir, "map_tiles.mbtiles"), url_template=tiles.url_template)
+    viewer = MapViewer(tile_store=store)
+    # Vehicles appear with their first fix; this one is followed and carries the single-track cases
+    viewer.update_track([(BASE_LAT, BASE_LON, time.time())])
+    try:
+        width, height = viewer.map_width, viewer.map_height
+        results["map.lat_lon_to_pixel"] = measure(
+            lambda: viewer.lat_lon_to_pixel(BASE_LAT + 1e-4, BASE_LON - 1e-4, width, height)
+        )
+
+        target = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        full = QRect(0, 0, width, height)
+
+        def paint():
+            painter = QPainter(target)
+            viewer.paint_layers(painter, full)
+            painter.end()
+
+        def redraw_and_paint():
+            viewer.redraw_markers()
+            paint()
+
+        trail_lengths = (100, 1000, 10000) if quick else (100, 1000, 10000, 100000)
+        for length in trail_lengths:
+            viewer.gps_path.clear()
+            lats, lons, stamps = synthetic_track(length)
+            for lat, lon, stamp in zip(lats.tolist(), lons.tolist(), stamps.tolist()):
+                viewer.gps_path.append(lat, lon, stamp)
+            viewer.animated_marker.animate_to(float(lats[-1]), float(lons[-1]), duration=0)
+            # Overlay rebuilt from the track (what a new fix or pan costs) ...
+            results[f"map.redraw_markers[trail={length}]"] = measure(redraw_and_paint)
+            # ... and a repaint with the overlay cached (what a marker animation frame costs)
+            paint()
+            results[f"map.paint_cached[trail={length}]"] = measure(paint)
+
+        # Many vehicles with 1000-fix trails, half of them outside the view
+        viewer.gps_path.clear()
+        lats, lons, stamps = synthetic_track(1000)
+        fixes = list(zip(lats.tolist(), lons.tolist(), stamps.tolist()))
+        vehicle_counts = (1, 10) if quick else (1, 10, 100)
+        for count in vehicle_counts:
+            for vehicle_id in range(len(viewer.vehicles), count + 1):
+                # Odd vehicles are placed about 2 km away, well off screen at the default zoom
+                shift = 0.02 if vehicle_id % 2 else vehicle_id * 2e-5
+                viewer.update_track([(lat + shift, lon, stamp) for lat, lon, stamp in fixes], vehicle_id)
+                viewer.vehicles[vehicle_id].marker.animate_to(fixes[-1][0] + shift, fixes[-1][1], duration=0)
+            results[f"map.redraw_markers[vehicles={count}]"] = measure(redraw_and_paint)
+            paint()
+            results[f"map.paint_cached[vehicles={count}]"] = measure(paint)
+    finally:
+        viewer.shutdown()
+        viewer.render_worker.wait(2000)
+        viewer.prefetcher.wait(2000)
+        viewer.deleteLater()
+        store.close()
+
+
+def bench_camera(results, quick, workdir):
+    import cv2
+    from PyQt6.QtWidgets import QLabel
+    from components.cameraFeed import CameraFeed, PREVIEW_WIDTH, PREVIEW_HEIGHT, FULLSCREEN_WIDTH, FULLSCREEN_HEIGHT
+    from load_generator import synthetic_frame
+    from utility.image_chunks import FrameAssembler, encode_chunks
+
+    feed = CameraFeed()
+    decoder = feed.decoder
+    preview = {"preview": (PREVIEW_WIDTH, PREVIEW_HEIGHT)}
+    both = dict(preview, fullscreen=(FULLSCREEN_WIDTH, FULLSCREEN_HEIGHT))
+    resolutions = ((640, 480), (1280, 720)) if quick else ((640, 480), (1280, 720), (1920, 1080), (3840, 2160))
+    for width, height in resolutions:
+        ok, jpeg = cv2.imencode(".jpg", synthetic_frame(width, height, 1), [cv2.IMWRITE_JPEG_QUALITY, 80])
+        data = jpeg.tobytes()
+        # Decode and scale, as the worker does it; the fullscreen view adds a second, much larger scale
+        # Frames go straight back to the pool, as they would once displayed, so this is the steady state
+        results[f"camera.decode[{width}x{height},preview]"] = measure(lambda: decoder.decode(data, preview).release())
+        timing = measure(lambda: decoder.decode(data, both).release())
+        timing["jpeg_bytes"] = len(data)
+        results[f"camera.decode[{width}x{height},fullscreen]"] = timing
+
+        # What is left on the GUI thread: swapping the finished images in. Showing a frame takes over
+        # its buffer leases, so every call gets a freshly decoded one
+        feed.fullscreen_label = QLabel()
+
+        def next_frame():
+            decoder.ready = decoder.decode(data, both)
+
+        results[f"camera.display[{width}x{height},fullscreen]"] = measure(feed.show_frame, setup=next_frame, max_number=1)
+        feed.fullscreen_label = None
+        feed.release_view("fullscreen")
+
+        # Splitting the frame into MTU-sized chunks and reassembling it, as sender and network loop do
+        assembler = FrameAssembler()
+        frame_ids = iter(range(1 << 32))
+
+        def reassemble():
+            for chunk in encode_chunks(next(frame_ids), data):
+                assembler.add(chunk)
+        results[f"camera.reassemble[{width}x{height}]"] = measure(reassemble)
+    feed.shutdown()
+    feed.deleteLater()
+
+
+def bench_render_map(results, quick, workdir, tiles):
+    from utility.static_mapping import MappingUtility
+    from utility.tile_store import TileStore
+
+    cold_dir = os.path.join(workdir, "cold")
+    state = {}
+
+    def fresh_store():
+        # Cold: every tile goes through the stand-in server and into an empty store
+        if "utility" in state:
+            state["utility"].tile_store.close()
+        shutil.rmtree(cold_dir, ignore_errors=True)
+        os.makedirs(cold_dir)
+        store = TileStore(os.path.join(cold_dir, "tiles.mbtiles"), url_template=tiles.url_template)
+        state["utility"] = MappingUtility(BASE_LAT, BASE_LON, 17, tile_store=store)
+
+    requests_before = tiles.requests
+    results["render_map.cold"] = measure(lambda: state["utility"].render_map(), repeat=3, max_number=1,
+                                        setup=fresh_store)
+    results["render_map.cold"]["tile_requests"] = tiles.requests - requests_before
+    state["utility"].tile_store.close()
+
+    warm_store = TileStore(os.path.join(workdir, "warm.mbtiles"), url_template=tiles.url_template)
+    utility = MappingUtility(BASE_LAT, BASE_LON, 17, tile_store=warm_store)
+    utility.red_markers = [(BASE_LAT + i * 2e-4, BASE_LON + i * 2e-4) for i in range(10)]
+    utility.render_map()
+    results["render_map.warm"] = measure(utility.render_map, repeat=3)
+    warm_store.close()
+
+
+def bench_waypoints(results, quick, workdir):
+    from components.waypointViewer import WaypointViewer
+
+    row_counts = (10, 1000) if quick else (10, 1000, 100000)
+    waypoint = {"control": 1, "waypoint_type": "GPS", "latitude": str(BASE_LAT), "longitude": str(BASE_LON),
+                "altitude": "0"}
+    for rows in row_counts:
+        viewer = WaypointViewer()
+
+        def fill():
+            viewer.clear_all()
+            for _ in range(rows):
+                viewer.add_waypoint(waypoint)
+        results[f"waypoints.fill[rows={rows}]"] = measure(fill, repeat=3)
+
+        viewer.primary_selected = rows // 2
+        viewer.table.setCurrentCell(rows // 2, 0)
+        results[f"waypoints.update_status[rows={rows}]"] = measure(lambda: viewer.update_status("NAVIGATING"),
+                                                                  repeat=3)
+        results[f"waypoints.reindex[rows={rows}]"] = measure(viewer.reindex_waypoints, repeat=3)
+        results[f"waypoints.get_all_mission_data[rows={rows}]"] = measure(viewer.get_all_mission_data, repeat=3)
+        results[f"waypoints.emit_mission_data[rows={rows}]"] = measure(viewer.emit_mission_data, repeat=3)
+
+        def remove_middle():
+            viewer.table.setCurrentCell(viewer.table.rowCount() // 2, 0)
+            viewer.remove_selected()
+
+        def add_one():
+            viewer.add_waypoint(waypoint)
+        # Keep the row count steady: every timed removal is paired with an untimed insert
+        results[f"waypoints.remove_selected[rows={rows}]"] = measure(remove_middle, repeat=3, max_number=1, setup=add_one)
+        results[f"waypoints.clear_all[rows={rows}]"] = measure(viewer.clear_all, repeat=3, max_number=1, setup=fill)
+        viewer.deleteLater()
+
+
+GROUPS = ("parse", "map", "camera", "render_map", "waypoints")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(groups=GROUPS, quick=False):
+    from PyQt6.QtCore import QT_VERSION_STR
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="sendergui-bench-")
+    tiles = TileStandIn()
+    try:
+        for group in groups:
+            start = time.perf_counter()
+            if group in ("map", "render_map"):
+                globals()[f"bench_{group}"](results, quick, workdir, tiles)
+            else:
+                globals()[f"bench_{group}"](results, quick, workdir)
+            app.processEvents()
+            print(f"{group:<12} done in {time.perf_counter() - start:6.1f} s", file=sys.stderr)
+    finally:
+        tiles.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "quick": quick,
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print median ratios against a baseline run and return the cases slower than threshold"""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<52} {result['median'] * 1e6:12.2f} us   (new)")
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{name:<52} {result['median'] * 1e6:12.2f} us  x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated groups from {', '.join(GROUPS)}")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, skips the 100k cases")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<time>_<revision>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(sorted(unknown))}")
+
+    report = run(groups, args.quick)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = time.strftime("%Y%m%d_%H%M%S") + (f"_{report['meta']['revision']}" if report["meta"]["revision"] else "")
+        output = os.path.join(RESULTS_DIR, name + ".json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, result in report["results"].items():
+            print(f"{name:<52} {result['median'] * 1e6:12.2f} us")
+
+
+if __name__ == "__main__":
+    main()
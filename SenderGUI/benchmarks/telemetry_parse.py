@@ -0,0 +1,66 @@
+"""Compare UDPListener parse throughput for the JSON, CSV and binary telemetry formats.
+
+    python benchmarks/telemetry_parse.py [--packets N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from utility.listen_to_udp import parse_packet
+from utility.telemetry_frame import encode_frame
+
+
+def make_packets(fmt, count, base_lat=23.83778611, base_lon=90.35948889):
+    packets = []
+    now = time.time()
+    for i in range(count):
+        lat = base_lat + i * 1e-6
+        lon = base_lon + i * 1e-6
+        if fmt == "json":
+            packets.append(json.dumps({
+                "seq": i, "timestamp": now + i * 0.01, "lat": lat, "lon": lon,
+                "heading": 45.0, "speed": 1.5, "mission_state": 2,
+            }).encode())
+        elif fmt == "csv":
+            packets.append(f"{lat},{lon}".encode())
+        else:
+            packets.append(encode_frame(i, now + i * 0.01, lat, lon, 45.0, 1.5, 2))
+    return packets
+
+
+def bench(packets, repeat=5):
+    """Best-of-repeat packets per second through parse_packet"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for data in packets:
+            parse_packet(data)
+        best = min(best, time.perf_counter() - start)
+    return len(packets) / best
+
+
+def run(count=100000):
+    results = {}
+    for fmt in ("json", "csv", "binary"):
+        packets = make_packets(fmt, count)
+        rate = bench(packets)
+        results[fmt] = {
+            "packets_per_second": rate,
+            "us_per_packet": 1e6 / rate,
+            "bytes_per_packet": len(packets[0]),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packets", type=int, default=100000)
+    args = parser.parse_args()
+    results = run(args.packets)
+    for fmt, r in results.items():
+        print(f"{fmt:<7} {r['packets_per_second']:>12,.0f} pkt/s  {r['us_per_packet']:6.2f} us/pkt  "
+              f"{r['bytes_per_packet']:4d} B/pkt")
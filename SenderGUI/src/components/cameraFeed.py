@@ -1,8 +1,8 @@
-from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget, QPushButton
-from PyQt6.QtGui import QPixmap, QImage
-from PyQt6.QtCore import Qt
-import cv2
-import numpy as np
+from PyQt6.QtWidgets import QLabel, QVBoxLayout, QHBoxLayout, QWidget, QPushButton
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import Qt, QTimer
+
+from utility.frame_decoder import FrameDecoder
 
 PREVIEW_WIDTH = 480
 PREVIEW_HEIGHT = 360
@@ -18,28 +18,103 @@ class CameraFeed(QWidget):
         self.fullscreen_btn = QPushButton("Full Screen")
         self.fullscreen_btn.clicked.connect(self.show_fullscreen)
 
+        # Optional decode statistics (timings and dropped frames), refreshed once a second while shown
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: gray;")
+        self.stats_label.hide()
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.stats_btn = QPushButton("Stats")
+        self.stats_btn.setCheckable(True)
+        self.stats_btn.toggled.connect(self.show_stats)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.fullscreen_btn)
+        buttons.addWidget(self.stats_btn)
+
         layout = QVBoxLayout(self)
         layout.addWidget(self.label)
-        layout.addWidget(self.fullscreen_btn)
+        layout.addLayout(buttons)
+        layout.addWidget(self.stats_label)
         self.setLayout(layout)
 
         self.fullscreen_window = None
         self.fullscreen_label = None
         self.last_pixmap = None
+        # The pixmaps on screen read from pooled buffers; each view's lease is released when its pixmap is replaced
+        self.shown_leases = {}
+
+        # Decoding and scaling run on a worker; this widget only swaps in finished images.
+        # Targets follow the visible views (see update_targets), so nothing is decoded while hidden
+        self.decoder = FrameDecoder()
+        self.decoder.frame_ready.connect(self.show_frame)
+        self.decoder.start()
 
     def update_image(self, img_bytes):
-        np_arr = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        if img is not None:
-            rgb_img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_img.shape
-            bytes_per_line = ch * w
-            qt_img = QImage(rgb_img.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_img)
+        """Hand a JPEG to the decoder; safe to call from any thread, and a newer frame replaces a waiting one"""
+        self.decoder.submit(img_bytes)
+
+    def show_frame(self):
+        frame = self.decoder.take_frame()
+        if frame is None:
+            return
+        pixmap = self.show_view(frame, "preview", self.label)
+        if pixmap is not None:
             self.last_pixmap = pixmap
-            self.label.setPixmap(pixmap.scaled(PREVIEW_WIDTH, PREVIEW_HEIGHT, Qt.AspectRatioMode.KeepAspectRatio))
-            if self.fullscreen_label is not None:
-                self.fullscreen_label.setPixmap(pixmap.scaled(FULLSCREEN_WIDTH, FULLSCREEN_HEIGHT, Qt.AspectRatioMode.KeepAspectRatio))
+        if self.fullscreen_label is not None:
+            self.show_view(frame, "fullscreen", self.fullscreen_label)
+        frame.release()
+        self.decoder.mark_displayed(frame)
+
+    def show_view(self, frame, view, label):
+        """Put one view's image on its label, taking over its buffer lease; returns the pixmap or None"""
+        image = frame.images.get(view)
+        lease = frame.leases.pop(view, None)
+        if image is None or lease is None:
+            return None
+        # RGB32 pixmaps share the image's pixels, so the previous lease is only returned once its pixmap is off screen
+        pixmap = QPixmap.fromImage(image)
+        label.setPixmap(pixmap)
+        self.release_view(view)
+        self.shown_leases[view] = lease
+        return pixmap
+
+    def release_view(self, view):
+        lease = self.shown_leases.pop(view, None)
+        if lease is not None:
+            lease.release()
+
+    def update_targets(self):
+        """Decode for the views on screen: the preview, the fullscreen window, both or neither"""
+        targets = {}
+        if self.isVisible():
+            targets["preview"] = (PREVIEW_WIDTH, PREVIEW_HEIGHT)
+        if self.fullscreen_window is not None:
+            targets["fullscreen"] = (FULLSCREEN_WIDTH, FULLSCREEN_HEIGHT)
+        self.decoder.set_targets(targets)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_targets()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_targets()
+
+    def show_stats(self, visible):
+        self.stats_label.setVisible(visible)
+        if visible:
+            self.update_stats()
+            self.stats_timer.start(1000)
+        else:
+            self.stats_timer.stop()
+
+    def update_stats(self):
+        self.stats_label.setText(self.decoder.format_stats())
+
+    def shutdown(self):
+        """Stop the decode worker before the application exits"""
+        self.decoder.stop()
 
     def show_fullscreen(self):
         if self.fullscreen_window is None:
@@ -65,6 +140,8 @@ class CameraFeed(QWidget):
 
             self.fullscreen_window.setLayout(layout)
             self.fullscreen_window.showFullScreen()
+            # Frames are now also decoded for the fullscreen view; the last one is redone right away
+            self.update_targets()
         else:
             self.fullscreen_window.showFullScreen()
 
@@ -72,4 +149,6 @@ class CameraFeed(QWidget):
         if self.fullscreen_window is not None:
             self.fullscreen_window.close()
             self.fullscreen_window = None
-            self.fullscreen_label = None
\ No newline at end of file
+            self.fullscreen_label = None
+            self.release_view("fullscreen")
+            self.update_targets()
\ No newline at end of file
@@ -0,0 +1,540 @@
+import math
+import os
+import threading
+import time
+
+import cv2
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal, Qt
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QComboBox, QCheckBox, QFrame, QGridLayout, QSizePolicy
+
+from utility.app_logging import get_logger
+from utility.frame_decoder import fit_size
+from utility.frame_pool import FramePool
+from utility.link_stats import LatencyHistogram
+
+log = get_logger("camera")
+
+# FFmpeg demuxer options for live streams: no input buffering, no reordering delay, and a tiny probe so
+# the first frame is not held back while FFmpeg analyses the stream. TCP is what OpenCV uses by default.
+LOW_DELAY_OPTIONS = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay|probesize;32|analyzeduration;0|max_delay;0|reorder_queue_size;0"
+# OpenCV reads the options from the environment when a capture opens, so opens are serialized
+_open_lock = threading.Lock()
+
+DEFAULT_FPS = 30.0
+# A grab that returns within this fraction of the frame interval came out of FFmpeg's backlog, not off the wire
+BACKLOG_FRACTION = 0.25
+# Never drain for longer than this without showing a frame, so a source that never blocks (a file) still plays
+MAX_DRAIN_SECONDS = 0.5
+
+# Pixels per second the mosaic converts and draws across all its tiles, about two 1080p streams at 30 fps
+MOSAIC_PIXEL_BUDGET = 1920 * 1080 * 60
+# The unfocused tiles always share at least this fraction of the budget, however large the focused one is
+MIN_THUMBNAIL_SHARE = 0.25
+# Below this an unfocused tile loses resolution instead of frame rate
+MIN_TILE_FPS = 5.0
+THUMBNAIL_COLUMNS = 4
+
+
+def open_capture(url, low_latency):
+    with _open_lock:
+        previous = os.environ.get("OPENCV_FFMPEG_CAPTURE_OPTIONS")
+        if low_latency and previous is None:
+            os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = LOW_DELAY_OPTIONS
+        try:
+            return cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+        finally:
+            if low_latency and previous is None:
+                del os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"]
+
+
+class CameraThread(QThread):
+    """Captures one stream and emits its frames as pooled QImages.
+
+    Instead of sleeping a fixed time per frame, which lets a stream faster
+    than the sleep back up in FFmpeg and drift behind real time, the thread
+    paces itself on the stream: a live capture blocks until the next frame
+    arrives, and a source that does not block is slowed to its frame rate.
+    In low-latency mode the capture is opened with LOW_DELAY_OPTIONS, frames
+    that were already queued are skipped with grab() (no conversion or copy)
+    and only the newest is retrieved, and no frame is retrieved at all while
+    the GUI still has the previous one pending. The receiver calls
+    frame_shown() with the capture time it was given, which records
+    capture-to-display latency. output_size and max_fps may be changed from
+    the GUI thread while running: frames are scaled down to fit the
+    output_size box before conversion, and no more than max_fps are
+    retrieved.
+    """
+    # The QImage borrows the lease's buffer; the receiver releases the lease once it has made its pixmap.
+    # The float is the time.monotonic() the frame was captured.
+    frame_ready = pyqtSignal(QImage, object, float)
+
+    def __init__(self, stream_url, pool=None, low_latency=True):
+        super().__init__()
+        self.stream_url = stream_url
+        self.running = False
+        self.pool = pool or FramePool()
+        self.low_latency = low_latency
+        self.pending_display = False
+        self.output_size = None
+        self.max_fps = None
+
+        self.stats_lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.interval = 1.0 / DEFAULT_FPS
+        self.captured = 0
+        self.shown = 0
+        self.drained = 0
+        self.skipped_busy = 0
+        self.skipped_rate = 0
+        self.frame_size = None
+
+    def run(self):
+        cap = open_capture(self.stream_url, self.low_latency)
+        self.running = True
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if 1.0 <= fps <= 240.0:
+            self.interval = 1.0 / fps
+        frame = None
+        scaled = None
+        last_arrival = None
+        last_emit = time.monotonic()
+        
+        while self.running and cap.isOpened():
+            start = time.monotonic()
+            if not cap.grab():
+                self.msleep(10)
+                continue
+            now = time.monotonic()
+            backlog = now - start < self.interval * BACKLOG_FRACTION
+            if not backlog:
+                # A frame that had to be waited for: its spacing is the stream's real rate
+                if last_arrival is not None and now - last_arrival < 1.0:
+                    self.interval += ((now - last_arrival) - self.interval) * 0.1
+                last_arrival = now
+            if self.low_latency:
+                if backlog and now - last_emit < MAX_DRAIN_SECONDS:
+                    with self.stats_lock:
+                        self.drained += 1
+                    continue
+                if self.pending_display:
+                    with self.stats_lock:
+                        self.skipped_busy += 1
+                    continue
+            elif backlog:
+                # Not live: hold the source to its own frame rate
+                delay = last_emit + self.interval - now
+                if delay > 0:
+                    time.sleep(delay)
+                    now = time.monotonic()
+            max_fps = self.max_fps
+            if max_fps and now - last_emit < 1.0 / max_fps - self.interval * 0.5:
+                with self.stats_lock:
+                    self.skipped_rate += 1
+                continue
+            # Passing the previous frame back in lets the capture decode into the same buffer every time
+            ret, frame = cap.retrieve(frame)
+            if not ret:
+                continue
+            height, width = frame.shape[:2]
+            self.frame_size = (width, height)
+            output = frame
+            box = self.output_size
+            if box is not None:
+                size = fit_size(width, height, *box)
+                if size[0] < width:
+                    if scaled is None or scaled.shape[:2] != (size[1], size[0]):
+                        scaled = None
+                    output = scaled = cv2.resize(frame, size, dst=scaled, interpolation=cv2.INTER_LINEAR)
+            lease = self.pool.acquire((output.shape[0], output.shape[1], 4))
+            cv2.cvtColor(output, cv2.COLOR_BGR2BGRA, dst=lease.array)
+            self.pending_display = True
+            last_emit = now
+            with self.stats_lock:
+                self.captured += 1
+            self.frame_ready.emit(lease.qimage(QImage.Format.Format_RGB32), lease, now)
+        
+        cap.release()
+
+    def frame_shown(self, captured):
+        """Called on the GUI thread once a frame captured at captured (time.monotonic()) is on screen"""
+        self.pending_display = False
+        with self.stats_lock:
+            self.shown += 1
+            self.latency.add((time.monotonic() - captured) * 1000)
+
+    def format_stats(self):
+        """One-line summary for the preview"""
+        with self.stats_lock:
+            parts = [f"{1.0 / self.interval:.1f} fps"]
+            summary = self.latency.summary()
+            if summary:
+                parts.append(f"capture→display p50 {summary['p50']:.1f} / p99 {summary['p99']:.1f} ms")
+            if self.low_latency:
+                parts.append(f"skipped {self.drained} queued, {self.skipped_busy} while busy")
+            if self.skipped_rate:
+                parts.append(f"{self.skipped_rate} over rate cap")
+            return " | ".join(parts)
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+def plan_budget(boxes, rates, focused, budget=MOSAIC_PIXEL_BUDGET):
+    """Split a pixel-rate budget across mosaic tiles.
+
+    boxes are the tiles' (width, height) on screen, rates their streams'
+    frame rates and focused the index of the focused tile. Returns one
+    (box, max_fps) per tile: the focused tile gets its whole box at the
+    stream's rate (max_fps None), the others split what is left evenly,
+    giving up frame rate first and resolution once they are down to
+    MIN_TILE_FPS.
+    """
+    plans = [(box, None) for box in boxes]
+    others = [i for i in range(len(boxes)) if i != focused]
+    if not others:
+        return plans
+    width, height = boxes[focused]
+    remaining = max(budget - width * height * rates[focused], budget * MIN_THUMBNAIL_SHARE)
+    share = remaining / len(others)
+    for i in others:
+        width, height = boxes[i]
+        area = max(1, width * height)
+        if area * rates[i] <= share:
+            continue
+        if share / area >= MIN_TILE_FPS:
+            plans[i] = (boxes[i], share / area)
+        else:
+            scale = math.sqrt(share / (MIN_TILE_FPS * area))
+            plans[i] = ((max(16, int(width * scale)), max(16, int(height * scale))), MIN_TILE_FPS)
+    return plans
+
+
+class MosaicTile(QFrame):
+    """One stream in the mosaic, with its own capture thread; click it to focus it"""
+    clicked = pyqtSignal(object)
+
+    def __init__(self, camera):
+        super().__init__()
+        self.camera = camera
+        self.url = camera.get('rtsp_url')
+        self.thread = None
+        self.lease = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+        self.title = QLabel(camera.get('label', 'Unknown'))
+        self.title.setStyleSheet("color: gray; font-size: 11px;")
+        layout.addWidget(self.title)
+        self.image = QLabel("🔄 Connecting...")
+        self.image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.image.setStyleSheet("background: black; color: gray;")
+        self.image.setMinimumSize(160, 90)
+        # The worker sizes frames to this label, so the label must not grow to fit them
+        self.image.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+        layout.addWidget(self.image, 1)
+        self.set_focused(False)
+
+    def start(self):
+        self.thread = CameraThread(self.url, low_latency=True)
+        self.thread.frame_ready.connect(self.update_frame)
+        self.thread.start()
+
+    def request_stop(self):
+        """Ask the thread to finish without waiting, so several tiles can shut down together"""
+        if self.thread:
+            self.thread.running = False
+
+    def stop(self):
+        if self.thread:
+            self.thread.stop()
+            self.thread = None
+        self.image.setPixmap(QPixmap())
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+
+    def box(self):
+        return self.image.width(), self.image.height()
+
+    def set_focused(self, focused):
+        self.setStyleSheet("MosaicTile { border: 2px solid %s; }" % ("#2d8cf0" if focused else "#333"))
+
+    def update_frame(self, qimg, lease, captured):
+        thread = self.sender()
+        if thread is not self.thread:
+            lease.release()
+            return
+        # Already scaled to the tile by the worker. An RGB32 pixmap shares the leased pixels,
+        # so the lease is held while it is on screen and the previous one released after the swap
+        self.image.setPixmap(QPixmap.fromImage(qimg))
+        if self.lease is not None:
+            self.lease.release()
+        self.lease = lease
+        thread.frame_shown(captured)
+
+    def update_stats(self, box, max_fps):
+        if not self.thread:
+            return
+        parts = [self.camera.get('label', 'Unknown')]
+        if self.thread.frame_size:
+            width, height = fit_size(*self.thread.frame_size, *box)
+            parts.append(f"{self.thread.frame_size[0]}x{self.thread.frame_size[1]} → {width}x{height}")
+        if max_fps:
+            parts.append(f"capped {max_fps:.0f} fps")
+        parts.append(self.thread.format_stats())
+        self.title.setText(" | ".join(parts))
+
+    def mousePressEvent(self, event):
+        self.clicked.emit(self)
+        super().mousePressEvent(event)
+
+
+class CameraMosaic(QWidget):
+    """Plays several streams at once: the focused one large on top, the rest as thumbnails below.
+
+    Every stream has its own low-latency CameraThread. Once a second (and
+    on resize or focus change) plan_budget() spreads budget pixels per
+    second across the tiles and each thread is told the size to scale its
+    frames to and how many to retrieve, so adding streams costs the
+    thumbnails frame rate and resolution rather than the focused view.
+    """
+
+    def __init__(self, budget=MOSAIC_PIXEL_BUDGET):
+        super().__init__()
+        self.setWindowTitle("Camera Mosaic")
+        self.budget = budget
+        self.grid = QGridLayout(self)
+        self.tiles = {}
+        self.focused = None
+        self.budget_timer = QTimer(self)
+        self.budget_timer.timeout.connect(self.apply_budget)
+
+    def set_streams(self, cameras):
+        """Play exactly these streams, keeping the ones already running"""
+        urls = [cam.get('rtsp_url') for cam in cameras if cam.get('rtsp_url')]
+        removed = [tile for url, tile in self.tiles.items() if url not in urls]
+        for tile in removed:
+            tile.request_stop()
+        for tile in removed:
+            tile.stop()
+            del self.tiles[tile.url]
+            tile.deleteLater()
+        for cam in cameras:
+            url = cam.get('rtsp_url')
+            if url and url not in self.tiles:
+                tile = self.tiles[url] = MosaicTile(cam)
+                tile.clicked.connect(self.focus)
+                tile.start()
+        if self.focused not in self.tiles:
+            self.focused = next(iter(self.tiles), None)
+        self.arrange()
+        if self.tiles:
+            self.budget_timer.start(1000)
+        log.info("Camera mosaic playing %d streams", len(self.tiles))
+
+    def focus(self, tile):
+        self.focused = tile.url
+        self.arrange()
+
+    def arrange(self):
+        for tile in self.tiles.values():
+            self.grid.removeWidget(tile)
+        for row in range(self.grid.rowCount()):
+            self.grid.setRowStretch(row, 0)
+        if not self.tiles:
+            return
+        others = [tile for url, tile in self.tiles.items() if url != self.focused]
+        columns = max(1, min(len(others), THUMBNAIL_COLUMNS))
+        focused = self.tiles[self.focused]
+        focused.set_focused(True)
+        self.grid.addWidget(focused, 0, 0, 1, columns)
+        self.grid.setRowStretch(0, 3)
+        for i, tile in enumerate(others):
+            tile.set_focused(False)
+            self.grid.addWidget(tile, 1 + i // columns, i % columns)
+            self.grid.setRowStretch(1 + i // columns, 1)
+        self.grid.activate()
+        self.apply_budget()
+
+    def apply_budget(self):
+        if not self.tiles:
+            return
+        tiles = list(self.tiles.values())
+        boxes = [tile.box() for tile in tiles]
+        rates = [1.0 / tile.thread.interval if tile.thread else DEFAULT_FPS for tile in tiles]
+        plans = plan_budget(boxes, rates, list(self.tiles).index(self.focused), self.budget)
+        for tile, (box, max_fps) in zip(tiles, plans):
+            if tile.thread:
+                tile.thread.output_size = box
+                tile.thread.max_fps = max_fps
+            tile.update_stats(box, max_fps)
+
+    def stop(self):
+        self.budget_timer.stop()
+        for tile in self.tiles.values():
+            tile.request_stop()
+        for tile in self.tiles.values():
+            tile.stop()
+            tile.deleteLater()
+        self.tiles.clear()
+        self.focused = None
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.apply_budget()
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
+
+
+class CameraFeed(QWidget):
+    def __init__(self):
+        super().__init__()
+        layout = QVBoxLayout(self)
+        
+        # Camera preview
+        self.preview = QLabel("Camera: Waiting for streams...")
+        self.preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview.setStyleSheet("background: black; color: gray; min-height: 200px; font-size: 12px;")
+        layout.addWidget(self.preview)
+        
+        # Controls
+        ctrl = QHBoxLayout()
+        
+        # Dropdown for stream selection
+        self.stream_combo = QComboBox()
+        self.stream_combo.addItem("No streams found", None)
+        ctrl.addWidget(self.stream_combo)
+        
+        self.play_btn = QPushButton("▶ Play")
+        self.play_btn.clicked.connect(self.start_stream)
+        self.play_btn.setEnabled(False)
+        ctrl.addWidget(self.play_btn)
+        
+        self.stop_btn = QPushButton("⏹ Stop")
+        self.stop_btn.clicked.connect(self.stop_stream)
+        self.stop_btn.setEnabled(False)
+        ctrl.addWidget(self.stop_btn)
+        
+        # Skip queued frames and show only the newest; off plays every frame at the stream's own rate
+        self.low_latency_box = QCheckBox("Low latency")
+        self.low_latency_box.setChecked(True)
+        ctrl.addWidget(self.low_latency_box)
+        
+        # Every discovered stream at once, in its own window
+        self.grid_btn = QPushButton("▦ Grid")
+        self.grid_btn.clicked.connect(self.show_mosaic)
+        self.grid_btn.setEnabled(False)
+        ctrl.addWidget(self.grid_btn)
+        
+        layout.addLayout(ctrl)
+        
+        # Frame rate and capture-to-display latency of the running stream
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: gray; font-size: 11px;")
+        layout.addWidget(self.stats_label)
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats)
+        
+        self.thread = None
+        self.cameras = []
+        self.mosaic = None
+
+    def update_streams(self, cameras):
+        """Called when discovery finds new cameras"""
+        self.cameras = cameras
+        current_url = self.stream_combo.currentData()
+        
+        self.stream_combo.clear()
+        
+        if not cameras:
+            self.stream_combo.addItem("No streams found", None)
+            self.play_btn.setEnabled(False)
+            self.grid_btn.setEnabled(False)
+            self.preview.setText("Camera: No streams detected")
+            return
+        
+        # Add all discovered streams
+        for cam in cameras:
+            label = cam.get('label', 'Unknown')
+            url = cam.get('rtsp_url')
+            codec = cam.get('codec', 'H264')
+            
+            display_text = f"{label} [{codec}]"
+            self.stream_combo.addItem(display_text, url)
+        
+        # Re-select previous stream if it still exists
+        if current_url:
+            for i in range(self.stream_combo.count()):
+                if self.stream_combo.itemData(i) == current_url:
+                    self.stream_combo.setCurrentIndex(i)
+                    break
+        
+        self.play_btn.setEnabled(True)
+        self.grid_btn.setEnabled(True)
+        if self.mosaic is not None and self.mosaic.isVisible():
+            self.mosaic.set_streams(cameras)
+        self.preview.setText(f"Camera: {len(cameras)} stream(s) available")
+        log.info("Camera feed updated with %d streams", len(cameras))
+
+    def start_stream(self):
+        url = self.stream_combo.currentData()
+        if not url:
+            self.preview.setText(" No stream selected")
+            return
+            
+        self.stop_stream()
+        self.preview.setText("🔄 Connecting...")
+        
+        self.thread = CameraThread(url, low_latency=self.low_latency_box.isChecked())
+        self.thread.frame_ready.connect(self.update_frame)
+        self.thread.start()
+        self.stats_timer.start(1000)
+        
+        self.play_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        log.info("Starting stream: %s", url)
+
+    def stop_stream(self):
+        self.stats_timer.stop()
+        if self.thread:
+            self.thread.stop()
+            log.info("Stream stats: %s", self.thread.format_stats())
+            self.thread = None
+        self.stats_label.clear()
+        self.preview.setPixmap(QPixmap())
+        self.preview.setText("Camera: Stopped")
+        self.play_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        log.info("Stream stopped")
+
+    def update_frame(self, qimg, lease, captured):
+        thread = self.sender()
+        if thread is not self.thread:
+            # Still queued from a stream that has since been stopped
+            lease.release()
+            return
+        # Scaling copies the pixels into a new pixmap, so the pooled buffer can go back right after
+        pix = QPixmap.fromImage(qimg).scaled(
+            640, 360, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+        )
+        lease.release()
+        self.preview.setPixmap(pix)
+        thread.frame_shown(captured)
+
+    def show_mosaic(self):
+        # The mosaic plays the selected stream too; no point decoding it twice
+        if self.thread:
+            self.stop_stream()
+        if self.mosaic is None:
+            self.mosaic = CameraMosaic()
+            self.mosaic.resize(1280, 800)
+        self.mosaic.set_streams(self.cameras)
+        self.mosaic.show()
+        self.mosaic.raise_()
+
+    def update_stats(self):
+        if self.thread:
+            self.stats_label.setText(self.thread.format_stats())
\ No newline at end of file
@@ -1,10 +1,9 @@
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel
-from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
 
 
 class MapModal(QDialog):
-    def __init__(self, map_path, parent=None):
+    def __init__(self, pixmap, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Enlarged Map View")
 
@@ -13,8 +12,6 @@ class MapModal(QDialog):
         layout = QVBoxLayout(self)
 
         self.image_label = QLabel()
-        pixmap = QPixmap(map_path)
-
         large_pixmap = pixmap.scaled(600, 600,
                                      Qt.AspectRatioMode.KeepAspectRatio,
                                      Qt.TransformationMode.SmoothTransformation)
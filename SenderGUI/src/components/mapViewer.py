@@ -1,12 +1,35 @@
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPointF, QPropertyAnimation, QEasingCurve, QObject, pyqtProperty
-from PyQt6.QtGui import QPixmap, QPainter, QColor, QPen
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QPushButton, QHBoxLayout
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QPointF, QRect, QRectF, QPropertyAnimation, QEasingCurve, QObject, pyqtProperty
+from PyQt6.QtGui import QPixmap, QPainter, QPainterPath, QColor, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QScrollArea, QPushButton, QHBoxLayout, QComboBox
 
 from components.mapModal import MapModal
 from utility.static_mapping import MappingUtility
+from utility.slippy_map import TilePixmapCache, MercatorProjection, TILE_SIZE, lat_lon_to_world
+from utility.track_store import TrackStore
+from utility.tile_prefetcher import TilePrefetcher
+from utility.map_render_worker import MapRenderWorker
+from utility.listen_to_udp import DEFAULT_VEHICLE
+from utility.app_logging import get_logger
 
+import os
+import time
 from math import radians, cos, sin, sqrt, atan2
 
+log = get_logger("map")
+
+# Trail and marker colours, handed out to vehicles in order of appearance
+VEHICLE_COLORS = [
+    (66, 133, 244),   # Google blue, the single-vehicle look
+    (52, 168, 83),
+    (251, 140, 0),
+    (171, 71, 188),
+    (0, 172, 193),
+    (229, 57, 53),
+    (124, 179, 66),
+    (92, 107, 192),
+]
+LABEL_WIDTH = 110
+
 class AnimatedMarker(QObject):
     position_changed = pyqtSignal()
     def __init__(self, lat, lon):
@@ -28,19 +51,73 @@ class AnimatedMarker(QObject):
         self._lon = value
         self.position_changed.emit()
     def animate_to(self, target_lat, target_lon, duration=800):
-        self.lat_anim = QPropertyAnimation(self, b"lat")
+        # Reuse one pair of animations; a new fix retargets them from wherever the marker is now
+        if not hasattr(self, "lat_anim"):
+            self.lat_anim = QPropertyAnimation(self, b"lat")
+            self.lat_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
+            self.lon_anim = QPropertyAnimation(self, b"lon")
+            self.lon_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
+        self.lat_anim.stop()
+        self.lon_anim.stop()
+        if duration <= 0:
+            self._lat = target_lat
+            self.lon = target_lon
+            return
         self.lat_anim.setDuration(duration)
         self.lat_anim.setStartValue(self._lat)
         self.lat_anim.setEndValue(target_lat)
-        self.lat_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
-        self.lon_anim = QPropertyAnimation(self, b"lon")
         self.lon_anim.setDuration(duration)
         self.lon_anim.setStartValue(self._lon)
         self.lon_anim.setEndValue(target_lon)
-        self.lon_anim.setEasingCurve(QEasingCurve.Type.InOutQuad)
         self.lat_anim.start()
         self.lon_anim.start()
 
+class VehicleTrack:
+    """Map state of one vehicle: its track, animated marker, destination and latest telemetry fields.
+
+    A vehicle that reports dest_lat/dest_lon in its telemetry gets that as its
+    destination; otherwise the mission destination is assigned to the vehicle
+    being followed. dirty_rect is the area its marker, label and destination
+    line covered when last painted, used for partial repaints and culling.
+    """
+
+    def __init__(self, vehicle_id, color, lat, lon, spill_path=None):
+        self.vehicle_id = vehicle_id
+        self.color = color
+        self.gps_path = TrackStore(spill_path=spill_path)
+        self.marker = AnimatedMarker(lat, lon)
+        self.current_lat = lat
+        self.current_lon = lon
+        self.destination_lat = None
+        self.destination_lon = None
+        self.fields = {}
+        self.last_fix_time = None
+        self.dirty_rect = QRect()
+        # Trail polygon in view pixels, kept until the track or the view changes
+        self.trail_key = None
+        self.trail_polygon = None
+
+    @property
+    def label(self):
+        return "Primary" if self.vehicle_id == DEFAULT_VEHICLE else f"Vehicle {self.vehicle_id}"
+
+    def has_destination(self):
+        return self.destination_lat is not None and self.destination_lon is not None
+
+
+class MapCanvas(QWidget):
+    """Fixed-size map surface that lets MapViewer paint its layers into the damaged region only"""
+    def __init__(self, viewer, width, height):
+        super().__init__()
+        self.viewer = viewer
+        self.setFixedSize(width, height)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        self.viewer.paint_layers(painter, event.rect())
+        painter.end()
+
 class MapViewer(QWidget):
     pan_offset_x = 0
     pan_offset_y = 0
@@ -62,16 +139,13 @@ class MapViewer(QWidget):
         return distance > threshold
 
     def refresh_base_map(self, lat, lon):
-        """Update the underlying map tile from the utility and recenter"""
+        """Recenter the tiled base map on the given position"""
         self.mapping_utility.lat = lat
         self.mapping_utility.lon = lon
-        self.mapping_utility.render_map()
-        self.map_path = self.mapping_utility.get_map_path()
-        self.base_pixmap = QPixmap(self.map_path)
-        self.map_label.setPixmap(self.base_pixmap)
         self.pan_offset_x = 0
         self.pan_offset_y = 0
-        print(f"[FollowMe] Map recentered to Lat={lat}, Lon={lon}")
+        self.compose_base_map()
+        log.debug("Map recentered to Lat=%s, Lon=%s", lat, lon)
         self.redraw_markers()
 
     def mousePressEvent(self, event):
@@ -88,6 +162,7 @@ class MapViewer(QWidget):
             self.pan_offset_x += dx
             self.pan_offset_y += dy
             self._last_mouse_pos = pos
+            self.compose_base_map()
             self.redraw_markers()
             event.accept()
 
@@ -97,33 +172,63 @@ class MapViewer(QWidget):
             self._last_mouse_pos = None
             event.accept()
 
-    def __init__(self):
+    def __init__(self, tile_store=None):
         super().__init__()
         self.main_layout = QVBoxLayout(self)
         self.gps_status = QLabel("GPS:  Waiting for data... | Zoom: 15")
         self.gps_status.setStyleSheet("color: orange; font-weight: bold; padding: 5px;")
-        self.main_layout.addWidget(self.gps_status)
-        self.map_label = QLabel("")
-        self.map_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # Optional link-statistics overlay (rate, latency, loss), refreshed once a second while shown
+        self.link_stats = None
+        self.link_status = QLabel()
+        self.link_status.setStyleSheet("color: gray; padding: 5px;")
+        self.link_status.hide()
+        self.link_status_timer = QTimer(self)
+        self.link_status_timer.timeout.connect(self.update_link_status)
+        status_layout = QHBoxLayout()
+        status_layout.addWidget(self.gps_status)
+        status_layout.addStretch()
+        status_layout.addWidget(self.link_status)
+        self.main_layout.addLayout(status_layout)
         self.current_lat = 23.83778611
         self.current_lon = 90.35948889
         self.current_zoom = 19
-        self.destination_lat = None
-        self.destination_lon = None
         self.gps_connected = False
-        self.gps_path = []
-        self.max_path_points = 100
+        self.projection = MercatorProjection()
         self.show_path = True
-        self.animated_marker = AnimatedMarker(self.current_lat, self.current_lon)
-        self.animated_marker.position_changed.connect(self.redraw_markers)
         self.waypoints = []
-        self.mapping_utility = MappingUtility(self.current_lat, self.current_lon, self.current_zoom)
-        self.map_path = self.mapping_utility.get_map_path()
-        self.base_pixmap = QPixmap(self.map_path)
-        self.map_label.setPixmap(self.base_pixmap)
+        self.mapping_utility = MappingUtility(self.current_lat, self.current_lon, self.current_zoom, tile_store=tile_store)
+        # One VehicleTrack per vehicle ID; each full track spills beyond its in-memory window to assets/tracks
+        self.track_dir = os.path.join(self.mapping_utility.project_dir, "assets", "tracks")
+        self.track_session = time.strftime("%Y%m%d_%H%M%S")
+        # Vehicles appear with their first fix; the map follows the first one to report until the user picks another
+        self.vehicles = {}
+        self.follow_id = None
+        self.mission_vehicle = None
+        # The base map is composed from cached 256px tiles rather than a pre-rendered PNG
+        self.map_width = self.mapping_utility.max_width
+        self.map_height = self.mapping_utility.max_height
+        self.tile_cache = TilePixmapCache()
+        self._compose_pending = False
+        # Tile loading and snapshot exports run on a worker; the last good map stays up meanwhile
+        self.render_worker = MapRenderWorker(self.mapping_utility)
+        self.render_worker.tile_ready.connect(self.on_tile_ready)
+        self.render_worker.tile_failed.connect(self.on_tile_failed)
+        self.render_worker.start()
+        # Warms the tile store along the mission route and the rover's heading
+        self.prefetcher = TilePrefetcher(self.mapping_utility.tile_store)
+        self.prefetcher.start()
+        self._prefetch_key = None
+        # Layers: opaque tile base, cached overlay (trail and waypoints), and the marker painted live.
+        # Each is rebuilt only when its inputs change, and repaints are limited to damaged rects.
+        self.base_pixmap = QPixmap(self.map_width, self.map_height)
+        self.trail_pixmap = QPixmap(self.map_width, self.map_height)
+        self.trail_dirty = True
+        self.map_canvas = MapCanvas(self, self.map_width, self.map_height)
+        self.compose_base_map()
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setWidget(self.map_label)
+        self.scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.scroll_area.setWidget(self.map_canvas)
         self.main_layout.addWidget(self.scroll_area)
         button_layout = QHBoxLayout()
         self.refresh_map = QPushButton("Refresh Waypoints")
@@ -137,64 +242,208 @@ class MapViewer(QWidget):
         self.map_button = QPushButton("View Enlarged Map")
         self.map_button.clicked.connect(self.show_enlarged_map)
         button_layout.addWidget(self.map_button)
+        self.snapshot_button = QPushButton("Save Snapshot")
+        self.snapshot_button.clicked.connect(self.save_snapshot)
+        button_layout.addWidget(self.snapshot_button)
+        self.link_stats_button = QPushButton("Link Stats")
+        self.link_stats_button.setCheckable(True)
+        self.link_stats_button.toggled.connect(self.show_link_stats)
+        button_layout.addWidget(self.link_stats_button)
+        # Which vehicle the map follows; only shown once a second vehicle reports in
+        self.follow_label = QLabel("Follow:")
+        self.follow_combo = QComboBox()
+        # activated fires only for the user's own choice, not when the list is filled or synced
+        self.follow_combo.activated.connect(self.on_follow_selected)
+        self.follow_label.hide()
+        self.follow_combo.hide()
+        button_layout.addWidget(self.follow_label)
+        button_layout.addWidget(self.follow_combo)
         self.main_layout.addLayout(button_layout)
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.redraw_markers)
-        self.update_timer.start(50)
+        self.redraw_markers()
+
+    @property
+    def followed(self):
+        """The VehicleTrack the map follows, or None before any vehicle has reported"""
+        return self.vehicles.get(self.follow_id)
+
+    # The single-vehicle API works on the followed vehicle
+    @property
+    def gps_path(self):
+        vehicle = self.followed
+        return vehicle.gps_path if vehicle else None
+
+    @property
+    def animated_marker(self):
+        vehicle = self.followed
+        return vehicle.marker if vehicle else None
+
+    @property
+    def destination_lat(self):
+        vehicle = self.followed
+        return vehicle.destination_lat if vehicle else None
+
+    @property
+    def destination_lon(self):
+        vehicle = self.followed
+        return vehicle.destination_lon if vehicle else None
+
+    def add_vehicle(self, vehicle_id, lat, lon):
+        """Create the map state for a newly seen vehicle, starting at its first fix"""
+        suffix = "" if vehicle_id == DEFAULT_VEHICLE else "_" + "".join(
+            c if c.isalnum() else "_" for c in str(vehicle_id)
+        )
+        spill_path = os.path.join(self.track_dir, f"track_{self.track_session}{suffix}.bin")
+        color = VEHICLE_COLORS[len(self.vehicles) % len(VEHICLE_COLORS)]
+        vehicle = VehicleTrack(vehicle_id, color, lat, lon, spill_path)
+        vehicle.marker.position_changed.connect(lambda vehicle=vehicle: self.on_marker_moved(vehicle))
+        self.vehicles[vehicle_id] = vehicle
+        self.follow_combo.addItem(vehicle.label, vehicle_id)
+        if len(self.vehicles) > 1:
+            self.follow_label.show()
+            self.follow_combo.show()
+        log.info("New vehicle on the map: %s", vehicle.label)
+        if self.follow_id is None:
+            # First to report; apply_fixes centers the map on it
+            self.follow_id = vehicle_id
+            self.follow_combo.setCurrentIndex(self.follow_combo.findData(vehicle_id))
+        return vehicle
+
+    def on_follow_selected(self, index):
+        vehicle_id = self.follow_combo.itemData(index)
+        if vehicle_id is not None:
+            self.follow_vehicle(vehicle_id)
+
+    def follow_vehicle(self, vehicle_id):
+        """Center the map on vehicle_id and keep following it; prefetching and the status bar follow too"""
+        if vehicle_id not in self.vehicles or vehicle_id == self.follow_id:
+            return
+        self.follow_id = vehicle_id
+        vehicle = self.followed
+        index = self.follow_combo.findData(vehicle_id)
+        if index >= 0 and index != self.follow_combo.currentIndex():
+            self.follow_combo.setCurrentIndex(index)
+        self.current_lat = vehicle.current_lat
+        self.current_lon = vehicle.current_lon
+        self.refresh_base_map(vehicle.current_lat, vehicle.current_lon)
+        self.update_gps_status()
+        self._prefetch_key = None
+        self.plan_prefetch()
 
     def set_destination_to_latest_waypoint(self):
-        """Set the destination to the latest waypoint (if any)"""
+        """Set the followed vehicle's destination to the latest waypoint (if any)"""
+        vehicle = self.followed
+        if vehicle is None:
+            return
+        if self.mission_vehicle in self.vehicles and self.mission_vehicle != self.follow_id:
+            previous = self.vehicles[self.mission_vehicle]
+            previous.destination_lat = previous.destination_lon = None
+        self.mission_vehicle = self.follow_id
         if self.waypoints:
             last_wp = self.waypoints[-1]
             lat = last_wp.get('latitude') if isinstance(last_wp, dict) else getattr(last_wp, 'latitude', None)
             lon = last_wp.get('longitude') if isinstance(last_wp, dict) else getattr(last_wp, 'longitude', None)
             try:
-                self.destination_lat = float(lat)
-                self.destination_lon = float(lon)
+                vehicle.destination_lat = float(lat)
+                vehicle.destination_lon = float(lon)
             except Exception:
-                self.destination_lat = None
-                self.destination_lon = None
+                vehicle.destination_lat = None
+                vehicle.destination_lon = None
         else:
-            self.destination_lat = None
-            self.destination_lon = None
+            vehicle.destination_lat = None
+            vehicle.destination_lon = None
         self.redraw_markers()
 
     def update_map(self, coords):
         """Update waypoint markers (red) - these stay fixed on map"""
-        print(f"MapViewer: Updating {len(coords)} waypoint markers")
+        log.info("Updating %d waypoint markers", len(coords))
         self.waypoints = coords
-        self.mapping_utility.add_markers(coords)
-        new_map_path = self.mapping_utility.get_map_path()
-        # Only reload pixmap if map tile or markers changed
-        if new_map_path != self.map_path:
-            self.map_path = new_map_path
-            self.base_pixmap = QPixmap(self.map_path)
+        # Waypoints are drawn as overlays, so no map render is needed
+        self.mapping_utility.add_markers(coords, render=False)
         self.set_destination_to_latest_waypoint()  # Always set latest as destination
+        self.plan_prefetch()
+
+    def plan_prefetch(self):
+        """Re-plan tile prefetching when the rover enters a new tile or the route or zoom changes"""
+        world_x, world_y = lat_lon_to_world(self.current_lat, self.current_lon, self.current_zoom)
+        key = (
+            self.current_zoom,
+            int(world_x // TILE_SIZE),
+            int(world_y // TILE_SIZE),
+            tuple(self.mapping_utility.red_markers)
+        )
+        if key == self._prefetch_key:
+            return
+        self._prefetch_key = key
+        self.prefetcher.request_plan(
+            self.current_lat,
+            self.current_lon,
+            self.mapping_utility.red_markers,
+            self.current_zoom,
+            self.gps_path.motion() if self.gps_path is not None else None
+        )
 
     def update_current_position(self, lat, lon):
         """Update GPS position from ReceiverGUI (smooth animated blue marker)"""
-        print(f"MapViewer: GPS updated to Lat={lat}, Lon={lon}")
-        self.gps_connected = True
-        self.current_lat = lat
-        self.current_lon = lon
-        self.gps_path.append((lat, lon))
-        if len(self.gps_path) > self.max_path_points:
-            self.gps_path.pop(0)
-        # Recenter map if GPS moved far from center
-        if self.should_refresh_map_tile(lat, lon):
-            self.refresh_base_map(lat, lon)
-        self.animated_marker.animate_to(lat, lon, duration=800)
-        self.update_gps_status()
-        self.gps_status.repaint()
-        if self.destination_lat is not None and self.destination_lon is not None:
-            if self.is_at_destination(lat, lon, self.destination_lat, self.destination_lon):
-                print("Destination reached! Clearing waypoints.")
-                self.waypoints.clear()
-                self.destination_lat = None
-                self.destination_lon = None
-                self.mapping_utility.add_markers([])
+        self.update_track([(lat, lon, time.time())])
+
+    def update_track(self, fixes, vehicle_id=DEFAULT_VEHICLE):
+        """Apply a batch of (lat, lon, timestamp) fixes of one vehicle: all go on its trail, its marker moves once to the last"""
+        if not fixes:
+            return
+        self.apply_fixes(vehicle_id, fixes)
+        self.plan_prefetch()
         self.redraw_markers()
 
+    def update_batch(self, batch):
+        """Apply a TelemetryBatch from the hub, split per vehicle; the overlay is rebuilt once for all of them"""
+        groups = batch.by_vehicle()
+        if not groups:
+            return
+        for vehicle_id, fixes in groups.items():
+            self.apply_fixes(vehicle_id, fixes, batch.vehicle_fields.get(vehicle_id))
+        self.plan_prefetch()
+        self.redraw_markers()
+
+    def apply_fixes(self, vehicle_id, fixes, fields=None):
+        lat, lon, timestamp = fixes[-1]
+        vehicle = self.vehicles.get(vehicle_id)
+        if vehicle is None:
+            vehicle = self.add_vehicle(vehicle_id, lat, lon)
+        for fix_lat, fix_lon, fix_timestamp in fixes:
+            vehicle.gps_path.append(fix_lat, fix_lon, fix_timestamp)
+        vehicle.current_lat = lat
+        vehicle.current_lon = lon
+        if fields:
+            vehicle.fields.update(fields)
+            if "dest_lat" in fields and "dest_lon" in fields:
+                vehicle.destination_lat = float(fields["dest_lat"])
+                vehicle.destination_lon = float(fields["dest_lon"])
+        # Glide over the time since the previous update, so high-rate telemetry tracks closely
+        now = time.monotonic()
+        last = vehicle.last_fix_time
+        duration = int(min(800, (now - last) * 1000)) if last else 800
+        vehicle.last_fix_time = now
+        vehicle.marker.animate_to(lat, lon, duration=duration)
+        if vehicle_id == self.follow_id:
+            self.gps_connected = True
+            self.current_lat = lat
+            self.current_lon = lon
+            # Recenter map if the followed vehicle moved far from center
+            if self.should_refresh_map_tile(lat, lon):
+                self.refresh_base_map(lat, lon)
+            self.update_gps_status()
+        if vehicle.has_destination():
+            if self.is_at_destination(lat, lon, vehicle.destination_lat, vehicle.destination_lon):
+                vehicle.destination_lat = None
+                vehicle.destination_lon = None
+                if vehicle_id == self.mission_vehicle:
+                    log.info("Destination reached! Clearing waypoints.")
+                    self.waypoints.clear()
+                    self.mission_vehicle = None
+                    self.mapping_utility.add_markers([])
+                else:
+                    log.info("%s reached its destination", vehicle.label)
+
     def is_at_destination(self, lat1, lon1, lat2, lon2, threshold=5):
         """Check if current position is within threshold (meters) of destination"""
         # Haversine formula
@@ -217,106 +466,287 @@ class MapViewer(QWidget):
         self.redraw_markers()
 
     def clear_path(self):
-        self.gps_path.clear()
-        print("GPS path cleared")
+        for vehicle in self.vehicles.values():
+            vehicle.gps_path.clear()
+        log.info("GPS path cleared")
         self.redraw_markers()
 
+    def compose_base_map(self):
+        """Blit the visible cached tiles for the current center, zoom and pan offset into the base pixmap"""
+        self.projection.set_view(self.mapping_utility.lat, self.mapping_utility.lon, self.current_zoom)
+        painter = QPainter(self.base_pixmap)
+        self.tile_cache.compose(
+            painter,
+            self.projection.center_x - self.pan_offset_x,
+            self.projection.center_y - self.pan_offset_y,
+            self.current_zoom,
+            self.map_width,
+            self.map_height
+        )
+        painter.end()
+        missing = self.tile_cache.take_new_missing()
+        if missing:
+            self.render_worker.request_tiles(missing)
+
+    def on_tile_ready(self, z, x, y, image):
+        self.tile_cache.insert(z, x, y, QPixmap.fromImage(image))
+        # Tiles one level up or down are used as stand-ins, so they are worth a repaint too
+        if abs(z - self.current_zoom) <= 1:
+            self.schedule_compose()
+
+    def on_tile_failed(self, z, x, y):
+        self.tile_cache.mark_failed(z, x, y)
+
+    def save_snapshot(self):
+        """Render the current view with its waypoints in the background and export it as PNG"""
+        self.render_worker.request_render(
+            self.mapping_utility.lat,
+            self.mapping_utility.lon,
+            self.mapping_utility.zoom,
+            self.mapping_utility.red_markers,
+            export_path=self.mapping_utility.get_map_path()
+        )
+
+    def schedule_compose(self):
+        """Coalesce bursts of arriving tiles into one recompose per event loop pass"""
+        if not self._compose_pending:
+            self._compose_pending = True
+            QTimer.singleShot(0, self._compose_now)
+
+    def _compose_now(self):
+        self._compose_pending = False
+        self.compose_base_map()
+        self.map_canvas.update()
+
+    def shutdown(self):
+        """Stop background map work before the application exits"""
+        self.render_worker.stop()
+        self.prefetcher.stop()
+
     def redraw_markers(self):
-        if self.base_pixmap.isNull():
-            return
-        pixmap = self.base_pixmap.copy()
-        painter = QPainter(pixmap)
+        """Invalidate the cached overlay layer and repaint the whole view"""
+        self.trail_dirty = True
+        for vehicle in self.vehicles.values():
+            vehicle.dirty_rect = self.dynamic_layer_rect(vehicle)
+        self.map_canvas.update()
+
+    def on_marker_moved(self, vehicle):
+        """Repaint only the area the vehicle's marker and destination line left and entered"""
+        new_rect = self.dynamic_layer_rect(vehicle)
+        old_rect = vehicle.dirty_rect
+        dirty = old_rect.united(new_rect) if not old_rect.isNull() else new_rect
+        vehicle.dirty_rect = new_rect
+        # Off-screen vehicles fall outside the canvas, so Qt drops the update
+        if not dirty.isNull():
+            self.map_canvas.update(dirty)
+
+    def dynamic_layer_rect(self, vehicle=None):
+        """Bounding box of everything drawn for a vehicle in the dynamic layer (marker halo, label and destination line)"""
+        if vehicle is None:
+            vehicle = self.followed
+            if vehicle is None:
+                return QRect()
+        current_x, current_y = self.lat_lon_to_pixel(
+            vehicle.marker.lat, vehicle.marker.lon, self.map_width, self.map_height
+        )
+        if current_x is None or current_y is None:
+            return QRect()
+        x = current_x + self.pan_offset_x
+        y = current_y + self.pan_offset_y
+        rect = QRectF(x - 24, y - 24, 48, 48)
+        if len(self.vehicles) > 1:
+            rect = rect.united(QRectF(x + 14, y - 30, LABEL_WIDTH, 22))
+        if vehicle.has_destination():
+            dest_x, dest_y = self.lat_lon_to_pixel(
+                vehicle.destination_lat, vehicle.destination_lon, self.map_width, self.map_height
+            )
+            if dest_x is not None and dest_y is not None:
+                line = QRectF(QPointF(x, y), QPointF(dest_x + self.pan_offset_x, dest_y + self.pan_offset_y))
+                rect = rect.united(line.normalized().adjusted(-4, -4, 4, 4))
+        return rect.toAlignedRect()
+
+    def render_trail_layer(self):
+        """Redraw the cached overlay layer: every vehicle's trail, waypoint markers and destination markers"""
+        self.trail_dirty = False
+        self.trail_pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(self.trail_pixmap)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        map_width = pixmap.width()
-        map_height = pixmap.height()
+        map_width = self.map_width
+        map_height = self.map_height
         offset_x = self.pan_offset_x
         offset_y = self.pan_offset_y
-        # Draw GPS path trail (blue line)
-        if self.show_path and len(self.gps_path) > 1:
-            pen = QPen(QColor(66, 133, 244, 180))
+        # Draw GPS path trails, one polyline per vehicle in its colour
+        if self.show_path:
+            pen = QPen()
             pen.setWidth(4)
             pen.setCapStyle(Qt.PenCapStyle.RoundCap)
             pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
-            painter.setPen(pen)
-            points = []
-            for lat, lon in self.gps_path:
-                x, y = self.lat_lon_to_pixel(lat, lon, map_width, map_height)
-                if x is not None and y is not None:
-                    points.append(QPointF(x + offset_x, y + offset_y))
-            for i in range(len(points) - 1):
-                painter.drawLine(points[i], points[i + 1])
-        # Draw animated blue current position marker (Google Maps style)
-        current_x, current_y = self.lat_lon_to_pixel(
-            self.animated_marker.lat,
-            self.animated_marker.lon,
-            map_width,
-            map_height
-        )
-        # Draw line from current position to destination (if both exist)
-        if (
-            self.destination_lat is not None and self.destination_lon is not None
-            and self.animated_marker.lat is not None and self.animated_marker.lon is not None
-        ):
-            dest_x, dest_y = self.lat_lon_to_pixel(self.destination_lat, self.destination_lon, map_width, map_height)
-            curr_x, curr_y = self.lat_lon_to_pixel(self.animated_marker.lat, self.animated_marker.lon, map_width, map_height)
-            if dest_x is not None and dest_y is not None and curr_x is not None and curr_y is not None:
+            view = (self.current_zoom, self.projection.center_x, self.projection.center_y, offset_x, offset_y)
+            for vehicle in self.vehicles.values():
+                track = vehicle.gps_path
+                if len(track) < 2:
+                    continue
+                # Only vehicles with new fixes, or a moved view, are simplified and projected again
+                key = (track.first, track.total) + view
+                if key != vehicle.trail_key:
+                    vehicle.trail_key = key
+                    world_x, world_y = track.simplified_world(self.current_zoom)
+                    xs, ys = self.projection.normalized_to_pixels(
+                        world_x, world_y, map_width, map_height, offset_x, offset_y
+                    )
+                    # Trails that lie entirely outside the view are not drawn
+                    if xs.max() < 0 or xs.min() > map_width or ys.max() < 0 or ys.min() > map_height:
+                        vehicle.trail_polygon = None
+                    else:
+                        vehicle.trail_polygon = QPolygonF([QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())])
+                if vehicle.trail_polygon is None:
+                    continue
+                pen.setColor(QColor(*vehicle.color, 180))
+                painter.setPen(pen)
+                painter.drawPolyline(vehicle.trail_polygon)
+        # Draw waypoint markers (red) on top of the tiles
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 0, 0))
+        for marker_lat, marker_lon in self.mapping_utility.red_markers:
+            x, y = self.lat_lon_to_pixel(marker_lat, marker_lon, map_width, map_height)
+            if x is not None and y is not None:
+                painter.drawEllipse(QPointF(x + offset_x, y + offset_y), 5, 5)
+        # Draw destination markers (red), batched into one path per layer
+        rings = QPainterPath()
+        dots = QPainterPath()
+        for vehicle in self.vehicles.values():
+            if not vehicle.has_destination():
+                continue
+            dest_x, dest_y = self.lat_lon_to_pixel(vehicle.destination_lat, vehicle.destination_lon, map_width, map_height)
+            if dest_x is None or dest_y is None:
+                continue
+            center = QPointF(dest_x + offset_x, dest_y + offset_y)
+            if -16 <= center.x() <= map_width + 16 and -16 <= center.y() <= map_height + 16:
+                rings.addEllipse(center, 12, 12)
+                dots.addEllipse(center, 4, 4)
+        if not rings.isEmpty():
+            rings.setFillRule(Qt.FillRule.WindingFill)
+            painter.setPen(QPen(QColor(255, 255, 255), 3))
+            painter.setBrush(QColor(234, 67, 53))  # Google red
+            painter.drawPath(rings)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(255, 255, 255))
+            painter.drawPath(dots)
+        painter.end()
+
+    def paint_layers(self, painter, rect):
+        """Paint the damaged rect: cached base layer, cached overlay layer, then the live vehicle markers"""
+        if self.base_pixmap.isNull():
+            return
+        painter.drawPixmap(rect, self.base_pixmap, rect)
+        if self.trail_dirty:
+            self.render_trail_layer()
+        painter.drawPixmap(rect, self.trail_pixmap, rect)
+        painter.setClipRect(rect)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        map_width = self.map_width
+        map_height = self.map_height
+        offset_x = self.pan_offset_x
+        offset_y = self.pan_offset_y
+        # Only vehicles whose marker area meets the damaged rect are drawn; off-screen ones never do
+        visible = []
+        for vehicle in self.vehicles.values():
+            if not vehicle.dirty_rect.intersects(rect):
+                continue
+            current_x, current_y = self.lat_lon_to_pixel(vehicle.marker.lat, vehicle.marker.lon, map_width, map_height)
+            if current_x is not None and current_y is not None:
+                visible.append((vehicle, QPointF(current_x + offset_x, current_y + offset_y)))
+        if visible:
+            # Lines from each vehicle to its destination, one path for all
+            lines = QPainterPath()
+            for vehicle, point in visible:
+                if vehicle.has_destination():
+                    dest_x, dest_y = self.lat_lon_to_pixel(
+                        vehicle.destination_lat, vehicle.destination_lon, map_width, map_height
+                    )
+                    if dest_x is not None and dest_y is not None:
+                        lines.moveTo(point)
+                        lines.lineTo(QPointF(dest_x + offset_x, dest_y + offset_y))
+            if not lines.isEmpty():
                 pen = QPen(QColor(234, 67, 53, 200))  # Red for destination line
                 pen.setWidth(4)
                 pen.setStyle(Qt.PenStyle.DashLine)
                 painter.setPen(pen)
-                painter.drawLine(QPointF(curr_x + offset_x, curr_y + offset_y), QPointF(dest_x + offset_x, dest_y + offset_y))
-                # Draw destination marker (red)
-                painter.setPen(QPen(QColor(255, 255, 255), 3))
-                painter.setBrush(QColor(234, 67, 53))  # Google red
-                painter.drawEllipse(QPointF(dest_x + offset_x, dest_y + offset_y), 12, 12)
-                painter.setPen(Qt.PenStyle.NoPen)
-                painter.setBrush(QColor(255, 255, 255))
-                painter.drawEllipse(QPointF(dest_x + offset_x, dest_y + offset_y), 4, 4)
-        if current_x is not None and current_y is not None:
-            # Outer glow (light blue halo)
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+                painter.drawPath(lines)
+            # Markers (Google Maps style), one path per colour and layer instead of three draws per vehicle
+            by_color = {}
+            for vehicle, point in visible:
+                by_color.setdefault(vehicle.color, []).append(point)
+            # Outer glow (light halo)
             painter.setPen(Qt.PenStyle.NoPen)
-            painter.setBrush(QColor(66, 133, 244, 60))  # Google blue with transparency
-            painter.drawEllipse(QPointF(current_x + offset_x, current_y + offset_y), 22, 22)
-            # BLUE circle with white border
+            for color, points in by_color.items():
+                painter.setBrush(QColor(*color, 60))
+                painter.drawPath(self._circles(points, 22))
+            # Coloured circle with white border
             painter.setPen(QPen(QColor(255, 255, 255), 3))
-            painter.setBrush(QColor(66, 133, 244))  # Google Maps blue
-            painter.drawEllipse(QPointF(current_x + offset_x, current_y + offset_y), 12, 12)
+            for color, points in by_color.items():
+                painter.setBrush(QColor(*color))
+                painter.drawPath(self._circles(points, 12))
             # White center dot
             painter.setPen(Qt.PenStyle.NoPen)
             painter.setBrush(QColor(255, 255, 255))
-            painter.drawEllipse(QPointF(current_x + offset_x, current_y + offset_y), 4, 4)
-        painter.end()
-        self.map_label.setPixmap(pixmap)
+            painter.drawPath(self._circles([point for _, point in visible], 4))
+            if len(self.vehicles) > 1:
+                painter.setPen(QColor(33, 33, 33))
+                for vehicle, point in visible:
+                    painter.drawText(QPointF(point.x() + 16, point.y() - 14), vehicle.label)
+        if self.link_stats is not None:
+            # Fixes delivered since the last paint are now on screen
+            self.link_stats.record_paint()
+
+    @staticmethod
+    def _circles(points, radius):
+        path = QPainterPath()
+        path.setFillRule(Qt.FillRule.WindingFill)
+        for point in points:
+            path.addEllipse(point, radius, radius)
+        return path
 
     def lat_lon_to_pixel(self, lat, lon, width, height):
         try:
-            from math import pi, log, tan, cos
-            zoom_level = self.current_zoom
-            tile_size = 256
-            center_x = (self.current_lon + 180) / 360 * (2 ** zoom_level) * tile_size
-            center_y = ((1 - log(tan(self.current_lat * pi / 180) + 1 / cos(self.current_lat * pi / 180)) / pi) / 2) * (2 ** zoom_level) * tile_size
-            point_x = (lon + 180) / 360 * (2 ** zoom_level) * tile_size
-            point_y = ((1 - log(tan(lat * pi / 180) + 1 / cos(lat * pi / 180)) / pi) / 2) * (2 ** zoom_level) * tile_size
-            pixel_x = width / 2 + (point_x - center_x)
-            pixel_y = height / 2 + (point_y - center_y)
-            return pixel_x, pixel_y
+            return self.projection.to_pixel(lat, lon, width, height)
         except Exception as e:
-            print(f"Error converting coordinates: {e}")
+            log.warning("Error converting coordinates: %s", e)
             return None, None
 
     def update_gps_status(self):
         if self.gps_connected:
             path_count = len(self.gps_path)
+            vehicles = f" | Following: {self.followed.label} of {len(self.vehicles)}" if len(self.vehicles) > 1 else ""
             self.gps_status.setText(
-                f"GPS: Connected | Lat: {self.current_lat:.6f}, Lon: {self.current_lon:.6f} | Zoom: {self.current_zoom} | Path: {path_count} pts"
+                f"GPS: Connected | Lat: {self.current_lat:.6f}, Lon: {self.current_lon:.6f} | Zoom: {self.current_zoom} | Path: {path_count} pts{vehicles}"
             )
             self.gps_status.setStyleSheet("color: green; font-weight: bold; padding: 5px;")
         else:
             self.gps_status.setText(f"GPS:  Waiting for data... | Zoom: {self.current_zoom}")
             self.gps_status.setStyleSheet("color: orange; font-weight: bold; padding: 5px;")
 
+    def set_link_stats(self, link_stats):
+        """Trace painted fixes into link_stats (a LinkStats) and show it in the overlay"""
+        self.link_stats = link_stats
+
+    def show_link_stats(self, visible):
+        self.link_status.setVisible(visible)
+        if visible:
+            self.update_link_status()
+            self.link_status_timer.start(1000)
+        else:
+            self.link_status_timer.stop()
+
+    def update_link_status(self):
+        if self.link_stats is None:
+            self.link_status.setText("Link: no data")
+            return
+        self.link_status.setText(f"Link: {self.link_stats.format_overlay()}")
+
     def show_enlarged_map(self):
-        modal = MapModal(self.map_path, self)
+        modal = MapModal(self.map_canvas.grab(), self)
         modal.show()
 
     def wheelEvent(self, event):
@@ -329,20 +759,23 @@ class MapViewer(QWidget):
         if self.current_zoom < 19:
             self.current_zoom += 1
             self.mapping_utility.zoom = self.current_zoom
-            self.mapping_utility.render_map()
-            self.map_path = self.mapping_utility.get_map_path()
-            self.base_pixmap = QPixmap(self.map_path)
+            # Keep the same spot under the view center at the new scale
+            self.pan_offset_x *= 2
+            self.pan_offset_y *= 2
+            self.compose_base_map()
             self.redraw_markers()
             self.update_gps_status()
-            print(f"Zoomed IN to level {self.current_zoom}")
+            self.plan_prefetch()
+            log.debug("Zoomed in to level %d", self.current_zoom)
 
     def zoom_out(self):
         if self.current_zoom > 10:
             self.current_zoom -= 1
             self.mapping_utility.zoom = self.current_zoom
-            self.mapping_utility.render_map()
-            self.map_path = self.mapping_utility.get_map_path()
-            self.base_pixmap = QPixmap(self.map_path)
+            self.pan_offset_x /= 2
+            self.pan_offset_y /= 2
+            self.compose_base_map()
             self.redraw_markers()
             self.update_gps_status()
-            print(f"Zoomed OUT to level {self.current_zoom}")
\ No newline at end of file
+            self.plan_prefetch()
+            log.debug("Zoomed out to level %d", self.current_zoom)
\ No newline at end of file
@@ -1,5 +1,8 @@
 from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QPushButton
 from utility.send_udp_data import send_udp_data
+from utility.app_logging import get_logger
+
+log = get_logger("mission")
 
 
 class MissionViewer(QWidget):
@@ -30,9 +33,7 @@ class MissionViewer(QWidget):
         self.waypoint_data = waypoint_data
         self.waypoint_information.setText(f"Current Selected: {waypoint_data['wp_id']}")
 
-        print("Received waypoint data ===")
-        print(self.waypoint_data)
-        print("Received waypoint data ===")
+        log.info("Received waypoint data: %s", self.waypoint_data)
 
     def send_start_data(self):
         self.data_to_deliver["command"] = "start"
@@ -64,8 +65,5 @@ class MissionViewer(QWidget):
         self.data_to_deliver["type"] = self.waypoint_data['wp_type']
         self.data_to_deliver["control"] = self.waypoint_data['control']
 
-        print("UDP Data Sending ===")
-        print(self.data_to_deliver)
-        print("UDP Data Sending ===")
-
-        send_udp_data(self.data_to_deliver, "192.168.1.116", 5006) # Orin's IP and port
\ No newline at end of file
+        # The Orin by default; see SENDER_GUI_MISSION_TARGET in utility/send_udp_data.py
+        send_udp_data(self.data_to_deliver)
\ No newline at end of file
@@ -2,7 +2,10 @@ from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QSizePolicy, QHBoxLayout, QPushButton
 from PyQt6.QtWidgets import QAbstractItemView
 
-from utility.listen_to_udp import UDPListener
+from utility.telemetry_hub import TelemetryHub
+from utility.app_logging import get_logger
+
+log = get_logger("mission")
 
 
 class WaypointViewer(QWidget):
@@ -47,21 +50,19 @@ class WaypointViewer(QWidget):
         self.layout.addWidget(self.table)
         self.layout.addLayout(self.table_control)
 
+        self.subscription = None
 
-        self.listener = UDPListener(ip="127.0.0.1", port=5005)
-        self.listener.data_received.connect(self.update_status)
-        self.listener.start()
-
-    def update_status(self, data):
-        try:
-            mission_state = data["mission_state"]
-        except Exception:
-            mission_state = "N/A"
+    def start_listener(self):
+        """Follow mission_state from the shared telemetry hub; deferred until the dashboard starts networking"""
+        if self.subscription is None:
+            # The table only needs to keep up with a human, not the packet rate
+            self.subscription = TelemetryHub.instance().subscribe("mission_state", self.update_status, max_rate=10)
 
+    def update_status(self, mission_state):
         if self.primary_selected >= 0:
             self.clear_all_status()
             self.table.setItem(self.primary_selected, 6, QTableWidgetItem(str(mission_state)))
-        print(data)
+        log.debug("Mission state: %s", mission_state)
 
     def add_waypoint(self, data_dict):
         row_position = self.table.rowCount()
@@ -121,7 +122,7 @@ class WaypointViewer(QWidget):
             self.mission_pushed.emit(waypoint_data)
         else:
             # Optional: handle the case where no row is selected
-            print("No waypoint selected to push!")
+            log.warning("No waypoint selected to push!")
 
     def clear_all_status(self):
         for row in range(self.table.rowCount()):
@@ -129,14 +130,14 @@ class WaypointViewer(QWidget):
 
     def closeEvent(self, event):
         """Handle cleanup when the widget/window is closed."""
-        print("Closing WaypointViewer, stopping listener...")
-        if hasattr(self, 'listener'):
-            self.listener.stop()  # Sets self.running = False
-            self.listener.wait()  # Blocks the UI for a millisecond until the thread loop exits
+        log.debug("Closing WaypointViewer, unsubscribing from telemetry")
+        if self.subscription is not None:
+            TelemetryHub.instance().unsubscribe(self.subscription)
+            self.subscription = None
         event.accept()
 
     def get_all_mission_data(self):
-        print("Button is clicked")
+        log.debug("Collecting mission data for the map")
         all_waypoints = []
 
         for row in range(self.table.rowCount()):
@@ -0,0 +1,333 @@
+"""Localhost traffic generator for stress-testing the dashboard without hardware.
+
+    python load_generator.py telemetry --vehicles 4 --rate 200 --format binary
+    python load_generator.py video --fps 30 --width 1280 --height 720
+    python load_generator.py discovery --streams 3
+    python load_generator.py mission-receiver
+    python load_generator.py all --vehicles 2 --rate 50
+
+mission-receiver stands in for the Orin. The dashboard sends mission
+commands to the Orin's address unless told otherwise, so start it with
+SENDER_GUI_MISSION_TARGET=127.0.0.1:5006 (matching --mission-host and
+--mission-port) for a local run to receive them.
+
+telemetry replaces the old gps_test.py / gps_test_movement.py scripts:
+`telemetry --vehicles 1 --rate 2 --format csv` sends the same kind of
+"lat,lon" packets they did, along a moving track instead of a fixed list.
+"""
+import argparse
+import json
+import math
+import random
+import socket
+import threading
+import time
+
+from utility.telemetry_frame import encode_frame, NO_VEHICLE_ID
+from utility.image_chunks import encode_chunks
+
+BASE_LAT = 23.83778611
+BASE_LON = 90.35948889
+METERS_PER_DEGREE = 111320.0
+MISSION_STATES = ["IDLE", "NAVIGATING", "HOLDING", "ARRIVED"]
+MAX_UDP_PAYLOAD = 65507
+
+
+class Vehicle:
+    """Rover driving between random waypoints with smooth turns and speed changes"""
+
+    def __init__(self, vehicle_id, rng, radius=300.0):
+        self.vehicle_id = vehicle_id
+        self.rng = rng
+        self.radius = radius
+        # Start somewhere near the map center so every vehicle is on screen
+        self.north = rng.uniform(-radius, radius) / 4
+        self.east = rng.uniform(-radius, radius) / 4
+        self.heading = rng.uniform(0, 360)
+        self.speed = rng.uniform(1.0, 3.0)
+        self.cruise = rng.uniform(1.5, 5.0)
+        self.target = self._new_target()
+        self.state = 1
+
+    def _new_target(self):
+        return self.rng.uniform(-self.radius, self.radius), self.rng.uniform(-self.radius, self.radius)
+
+    def step(self, dt):
+        north_to = self.target[0] - self.north
+        east_to = self.target[1] - self.east
+        distance = math.hypot(north_to, east_to)
+        if distance < 5.0:
+            self.target = self._new_target()
+            self.state = 3 if self.state == 1 else 1
+        bearing = math.degrees(math.atan2(east_to, north_to)) % 360
+        # Turn at most 30 deg/s towards the target, accelerate towards cruise speed
+        turn = (bearing - self.heading + 180) % 360 - 180
+        self.heading = (self.heading + max(-30 * dt, min(30 * dt, turn))) % 360
+        self.speed += max(-0.5 * dt, min(0.5 * dt, self.cruise - self.speed))
+        self.north += self.speed * dt * math.cos(math.radians(self.heading))
+        self.east += self.speed * dt * math.sin(math.radians(self.heading))
+        # Some GPS noise
+        return (
+            BASE_LAT + (self.north + self.rng.gauss(0, 0.3)) / METERS_PER_DEGREE,
+            BASE_LON + (self.east + self.rng.gauss(0, 0.3)) / (METERS_PER_DEGREE * math.cos(math.radians(BASE_LAT))),
+        )
+
+
+def encode_telemetry(fmt, vehicle, seq, timestamp, lat, lon, multi_vehicle):
+    if fmt == "csv":
+        return f"{lat},{lon}".encode()
+    if fmt == "binary":
+        return encode_frame(seq, timestamp, lat, lon, vehicle.heading, vehicle.speed, vehicle.state,
+                            vehicle.vehicle_id if multi_vehicle else NO_VEHICLE_ID)
+    message = {
+        "seq": seq,
+        "timestamp": timestamp,
+        "lat": lat,
+        "lon": lon,
+        "heading": round(vehicle.heading, 2),
+        "speed": round(vehicle.speed, 2),
+        "mission_state": MISSION_STATES[vehicle.state],
+    }
+    if multi_vehicle:
+        message["vehicle_id"] = vehicle.vehicle_id
+    return json.dumps(message).encode()
+
+
+class Meter:
+    """Counts what a generator sent and prints a line every interval seconds"""
+
+    def __init__(self, name, interval=1.0):
+        self.name = name
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.count = 0
+        self.bytes = 0
+        self.skipped = 0
+        self.last_report = time.monotonic()
+        self.last_count = 0
+
+    def add(self, size):
+        with self.lock:
+            self.count += 1
+            self.bytes += size
+            now = time.monotonic()
+            if now - self.last_report >= self.interval:
+                rate = (self.count - self.last_count) / (now - self.last_report)
+                print(f"[{self.name}] {rate:8.1f}/s  total {self.count}  {self.bytes / 1e6:.1f} MB"
+                      + (f"  skipped {self.skipped}" if self.skipped else ""))
+                self.last_report = now
+                self.last_count = self.count
+
+
+def run_telemetry(args, stop):
+    rng = random.Random(args.seed)
+    vehicles = [Vehicle(i + 1, rng) for i in range(args.vehicles)]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    target = (args.host, args.port)
+    meter = Meter("telemetry")
+    interval = 1.0 / args.rate
+    # One sequence per sender socket, so the dashboard can count loss across all vehicles
+    seq = 0
+    start = time.perf_counter()
+    sent_rounds = 0
+    while not stop.is_set() and (args.count is None or sent_rounds < args.count):
+        # Send every round that is due, so the average rate holds even when sleep overshoots
+        due = int((time.perf_counter() - start) / interval) + 1
+        while sent_rounds < due and (args.count is None or sent_rounds < args.count):
+            timestamp = time.time()
+            for vehicle in vehicles:
+                lat, lon = vehicle.step(interval)
+                data = encode_telemetry(args.format, vehicle, seq, timestamp, lat, lon, len(vehicles) > 1)
+                seq += 1
+                if args.loss and rng.random() < args.loss:
+                    continue
+                try:
+                    sock.sendto(data, target)
+                except OSError as e:
+                    meter.skipped += 1
+                    if meter.skipped == 1:
+                        print(f"[telemetry] send failed: {e}")
+                    continue
+                meter.add(len(data))
+            sent_rounds += 1
+        next_round = start + sent_rounds * interval
+        delay = next_round - time.perf_counter()
+        if delay > 0:
+            time.sleep(min(delay, 0.05))
+    sock.close()
+
+
+def synthetic_frame(width, height, frame_number):
+    import cv2
+    import numpy as np
+
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    phase = frame_number * 4
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[..., 0] = (x + phase) % 256
+    image[..., 1] = (y + phase / 2) % 256
+    image[..., 2] = 128
+    bar = (frame_number * 8) % width
+    image[:, bar:bar + max(4, width // 64)] = 255
+    scale = max(0.5, height / 360)
+    cv2.putText(image, f"frame {frame_number}  {time.strftime('%H:%M:%S')}", (10, int(40 * scale)),
+                cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), max(1, int(2 * scale)))
+    return image
+
+
+def run_video(args, stop):
+    import cv2
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 << 20)
+    target = (args.host, args.video_port)
+    meter = Meter("video")
+    interval = 1.0 / args.fps
+    start = time.perf_counter()
+    frame_number = 0
+    while not stop.is_set() and (args.count is None or frame_number < args.count):
+        image = synthetic_frame(args.width, args.height, frame_number)
+        ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, args.quality])
+        frame_number += 1
+        if ok:
+            data = jpeg.tobytes()
+            if not args.whole_frames:
+                chunks = encode_chunks(frame_number, data)
+                # Drop chunks on purpose with --chunk-loss to exercise reassembly and timeouts
+                for chunk in chunks:
+                    if not (args.chunk_loss and random.random() < args.chunk_loss):
+                        sock.sendto(chunk, target)
+                meter.add(len(data))
+            elif len(data) > MAX_UDP_PAYLOAD:
+                meter.skipped += 1
+                if meter.skipped == 1:
+                    print(f"[video] {len(data)} byte frame does not fit one datagram; lower --quality or size")
+            else:
+                sock.sendto(data, target)
+                meter.add(len(data))
+        delay = start + frame_number * interval - time.perf_counter()
+        if delay > 0:
+            stop.wait(delay)
+    sock.close()
+
+
+def run_discovery(args, stop):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    labels = ["front", "rear", "arm", "mast", "belly", "left", "right", "aux"]
+    cams = [
+        {
+            "u": f"rtsp://{args.rtsp_host}:8554/{labels[i % len(labels)]}{'' if i < len(labels) else i}",
+            "l": labels[i % len(labels)].title(),
+            "c": "H264",
+        }
+        for i in range(args.streams)
+    ]
+    message = json.dumps({"t": "cam", "cams": cams}).encode()
+    meter = Meter("discovery", interval=10.0)
+    while not stop.is_set():
+        sock.sendto(message, (args.discovery_host, args.discovery_port))
+        meter.add(len(message))
+        stop.wait(args.discovery_interval)
+    sock.close()
+
+
+def run_mission_receiver(args, stop):
+    """Stand-in for the Orin's mission endpoint: print every command the dashboard pushes"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.mission_host, args.mission_port))
+    sock.settimeout(0.2)
+    print(f"[mission] listening on {args.mission_host}:{args.mission_port}")
+    received = 0
+    while not stop.is_set():
+        try:
+            data, addr = sock.recvfrom(65535)
+        except socket.timeout:
+            continue
+        received += 1
+        try:
+            command = json.loads(data.decode("utf-8"))
+        except ValueError:
+            command = data
+        print(f"[mission] #{received} from {addr[0]}:{addr[1]}: {command}")
+    sock.close()
+
+
+GENERATORS = {
+    "telemetry": run_telemetry,
+    "video": run_video,
+    "discovery": run_discovery,
+    "mission-receiver": run_mission_receiver,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Localhost traffic generator for the dashboard")
+    parser.add_argument("mode", choices=list(GENERATORS) + ["all"])
+    parser.add_argument("--host", default="127.0.0.1", help="dashboard address")
+    parser.add_argument("--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--count", type=int, default=None,
+                        help="stop after this many telemetry rounds / video frames")
+    parser.add_argument("--seed", type=int, default=1)
+
+    telemetry = parser.add_argument_group("telemetry")
+    telemetry.add_argument("--port", type=int, default=5005)
+    telemetry.add_argument("--vehicles", type=int, default=1)
+    telemetry.add_argument("--rate", type=float, default=10.0, help="packets per second per vehicle")
+    telemetry.add_argument("--format", choices=["json", "csv", "binary"], default="json")
+    telemetry.add_argument("--loss", type=float, default=0.0, help="fraction of packets to drop on purpose")
+
+    video = parser.add_argument_group("video")
+    video.add_argument("--video-port", type=int, default=5007)
+    video.add_argument("--fps", type=float, default=30.0)
+    video.add_argument("--width", type=int, default=640)
+    video.add_argument("--height", type=int, default=480)
+    video.add_argument("--quality", type=int, default=70)
+    video.add_argument("--whole-frames", action="store_true",
+                       help="send each JPEG as one datagram like older senders instead of in chunks")
+    video.add_argument("--chunk-loss", type=float, default=0.0, help="fraction of chunks to drop on purpose")
+
+    discovery = parser.add_argument_group("discovery")
+    discovery.add_argument("--discovery-host", default="127.0.0.1",
+                           help="use 255.255.255.255 to broadcast on the LAN")
+    discovery.add_argument("--discovery-port", type=int, default=5000)
+    discovery.add_argument("--discovery-interval", type=float, default=1.0)
+    discovery.add_argument("--streams", type=int, default=3)
+    discovery.add_argument("--rtsp-host", default="127.0.0.1")
+
+    mission = parser.add_argument_group(
+        "mission receiver", "point the dashboard here with SENDER_GUI_MISSION_TARGET=host:port"
+    )
+    mission.add_argument("--mission-host", default="127.0.0.1")
+    mission.add_argument("--mission-port", type=int, default=5006)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    modes = list(GENERATORS) if args.mode == "all" else [args.mode]
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=GENERATORS[mode], args=(args, stop), name=mode, daemon=True)
+        for mode in modes
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while any(thread.is_alive() for thread in threads):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=1.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,33 @@
+import time
+_process_start = time.perf_counter()  # before the Qt imports, so import time shows up in the startup report
+
+import os
 import sys
+import argparse
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget
 from PyQt6.QtGui import QIcon
-from ui.dashboard_ui import DashboardUI
-from utility.listen_to_udp import UDPListener
+from PyQt6.QtCore import QTimer
+from ui.dashboard_ui import DashboardUI, HEAVY_MODULES
+from utility.startup_profiler import StartupProfiler
+from utility.telemetry_hub import TelemetryHub
+from utility.network_core import NetworkCore
+from utility.app_logging import get_logger, setup_logging, shutdown_logging, parse_levels
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "recordings")
+
+log = get_logger("ui")
+
 
 class AppLogic(QMainWindow):
-    def __init__(self):
+    """Main window. The constructor only builds the window shell; start_deferred_init()
+    brings up the map, camera and networking one stage per event-loop pass after it is shown."""
+
+    def __init__(self, profiler, replay_path=None, replay_speed=1.0, record=True):
         super().__init__()
+        self.profiler = profiler
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        self.record = record
 
         self.setWindowTitle("Autonomous Dashboard")
         # self.setWindowIcon(QIcon("/home/labiba-ibnat-matin/Downloads/mongol_barota.png"))  
@@ -17,29 +38,81 @@ class AppLogic(QMainWindow):
 
         self.ui = DashboardUI()
         self.ui.setup_ui(self.central_widget)
-        
-        # Start UDP listener to receive GPS from ReceiverGUI
-        self.udp_listener = UDPListener(ip="0.0.0.0", port=5005)
-        self.udp_listener.gps_data_received.connect(self.on_gps_received)
-        self.udp_listener.start()
-        print("UDP Listener started on port 5005")
-    
-    def on_gps_received(self, lat, lon):
-        """Handle GPS data received from ReceiverGUI"""
-        print(f"Main: Received GPS - Lat: {lat}, Lon: {lon}")
-        # Pass GPS to dashboard UI
-        self.ui.on_gps_received(lat, lon)
-    
+        self.stages = self.ui.deferred_stages() + [("telemetry", self.start_telemetry)]
+
+    def start_deferred_init(self):
+        QTimer.singleShot(0, self.run_next_stage)
+
+    def run_next_stage(self):
+        if not self.stages:
+            self.profiler.mark("startup complete")
+            self.profiler.report()
+            return
+        name, stage = self.stages.pop(0)
+        with self.profiler.phase(name):
+            stage()
+        # Yield to the event loop between stages so the window keeps painting
+        QTimer.singleShot(0, self.run_next_stage)
+
+    def start_telemetry(self):
+        # Every consumer subscribes to the hub; it owns the one socket (or the replay) they share
+        hub = TelemetryHub.instance()
+        if self.replay_path:
+            from utility.telemetry_log import TelemetryReplay
+
+            # Feed a recorded field run through the same signals instead of the live socket
+            replay = hub.add_source(TelemetryReplay(self.replay_path, speed=self.replay_speed))
+            replay.start()
+            log.info("Replaying telemetry from %s at %sx", self.replay_path, self.replay_speed or "max")
+        else:
+            from utility.telemetry_log import TelemetryRecorder
+
+            # Start UDP listener to receive GPS from ReceiverGUI
+            recorder = None
+            if self.record:
+                recorder = TelemetryRecorder(
+                    os.path.join(RECORDINGS_DIR, time.strftime("telemetry_%Y%m%d_%H%M%S.tlm"))
+                )
+            hub.open_udp(ip="0.0.0.0", port=5005, recorder=recorder)
+            log.info("UDP Listener started on port 5005")
+
     def closeEvent(self, event):
-        """Stop UDP listener when closing"""
-        print("Stopping UDP listener...")
-        self.udp_listener.stop()
-        self.udp_listener.wait()
+        """Stop UDP listener and background workers when closing"""
+        self.stages.clear()
+        hub = TelemetryHub.instance()
+        if hub.sources:
+            log.info("Stopping UDP listener, stats: %s", hub.stats())
+            hub.shutdown()
+        self.ui.shutdown()
+        NetworkCore.instance().shutdown()
         event.accept()
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = AppLogic()
+    parser = argparse.ArgumentParser(description="Autonomous Dashboard")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded telemetry log instead of listening on UDP")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiple, 0 for as fast as possible")
+    parser.add_argument("--no-record", action="store_true", help="do not record received telemetry")
+    parser.add_argument("--startup-budget", type=float, default=500, metavar="MS",
+                        help="time budget for showing the window, reported at startup")
+    parser.add_argument("--log-level", default=None, metavar="LEVEL",
+                        help="level for every subsystem (DEBUG, INFO, WARNING, ...)")
+    parser.add_argument("--log", default="", metavar="SPEC",
+                        help="per-subsystem levels, e.g. net=DEBUG,map=WARNING")
+    args, qt_args = parser.parse_known_args()
+    setup_logging(level=args.log_level.upper() if args.log_level else None, levels=parse_levels(args.log))
+
+    profiler = StartupProfiler(origin=_process_start, window_budget_ms=args.startup_budget)
+    profiler.mark("imports done")
+    # Numpy, OpenCV, PIL etc. load in the background while the window shell is built
+    profiler.preload(HEAVY_MODULES)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    with profiler.phase("window shell"):
+        window = AppLogic(profiler, replay_path=args.replay, replay_speed=args.speed, record=not args.no_record)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    profiler.mark("window shown")
+    window.start_deferred_init()
+    exit_code = app.exec()
+    shutdown_logging()
+    sys.exit(exit_code)
@@ -1,3 +1,5 @@
+import os
+
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSizePolicy,
     QPushButton, QGroupBox, QSpinBox
@@ -8,11 +10,19 @@ from PyQt6.QtCore import Qt
 from components.waypointInput import WaypointInput
 from components.waypointViewer import WaypointViewer
 from components.missionViewer import MissionViewer
-from components.mapViewer import MapViewer
-from components.cameraFeed import CameraFeed
-from components.cameraDiscovery import CameraDiscovery
-from utility.udp_image_receiver import UDPImageReceiver
-from utility.teensy_sender import TeensySender
+from utility.telemetry_hub import TelemetryHub, TOPIC_BATCH
+from utility.app_logging import get_logger
+
+log = get_logger("ui")
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "assets")
+LOGO_PATHS = [
+    os.path.join(ASSETS_DIR, "logo.png"),
+    "/home/labiba-ibnat-matin/Downloads/logo.png",
+]
+# Imported on a background thread at startup; the map and camera stages need them
+HEAVY_MODULES = ["numpy", "cv2", "PIL.Image", "requests", "staticmap"]
+LOGO_SIZE = 80
 
 
 def circular_pixmap(pixmap, size):
@@ -34,6 +44,12 @@ def circular_pixmap(pixmap, size):
 
 
 class DashboardUI:
+    """Dashboard layout, built in stages.
+
+    setup_ui() only creates the light widgets and placeholders so the window
+    can be shown straight away. deferred_stages() lists the heavy parts (map,
+    camera, networking) for the caller to run once the window is up.
+    """
     def __init__(self):
         self.map_viewer = None
         self.header = None
@@ -48,6 +64,11 @@ class DashboardUI:
         self.main_layout = None
         self.image_receiver = None
         self.teensy = None
+        self.logo_label = None
+        self.map_placeholder = None
+        self.camera_placeholder = None
+        self.antenna_buttons = None
+        self.speed_spin = None
 
     def setup_ui(self, central_widget):
         self.main_layout = QVBoxLayout(central_widget)
@@ -57,13 +78,9 @@ class DashboardUI:
         header_outer_layout.addStretch()
         header_inner_layout = QHBoxLayout()
 
-        logo_label = QLabel()
-        pixmap = QPixmap("/home/labiba-ibnat-matin/Downloads/logo.png")
-        circle_size = 80
-        circular = circular_pixmap(pixmap, circle_size)
-        logo_label.setPixmap(circular)
-        logo_label.setFixedSize(circle_size, circle_size)
-        logo_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
+        self.logo_label = QLabel()
+        self.logo_label.setFixedSize(LOGO_SIZE, LOGO_SIZE)
+        self.logo_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
 
         title_label = QLabel("<b>Autonomous Dashboard</b>")
         title_label.setStyleSheet("""
@@ -73,7 +90,7 @@ class DashboardUI:
         """)
         title_label.setAlignment(Qt.AlignmentFlag.AlignVCenter)
 
-        header_inner_layout.addWidget(logo_label)
+        header_inner_layout.addWidget(self.logo_label)
         header_inner_layout.addWidget(title_label)
         header_outer_layout.addLayout(header_inner_layout)
         header_outer_layout.addStretch()
@@ -84,10 +101,7 @@ class DashboardUI:
         self.right_panel = QVBoxLayout()
         self.left_panel = QVBoxLayout()
 
-        # Create Teensy sender
-        self.teensy = TeensySender()  # defaults can be changed via self.teensy.set_target(ip, port)
-
-        # Antenna control group (left panel)
+        # Antenna control group (left panel); wired to the Teensy once networking starts
         antenna_group = QGroupBox("Antenna Control")
         ag_layout = QHBoxLayout()
         left_btn = QPushButton("Left")
@@ -96,62 +110,121 @@ class DashboardUI:
         ag_layout.addWidget(left_btn)
         ag_layout.addWidget(stop_btn)
         ag_layout.addWidget(right_btn)
+        self.antenna_buttons = {"LEFT": left_btn, "STOP": stop_btn, "RIGHT": right_btn}
 
         # Speed control
         speed_label = QLabel("Speed")
-        speed_spin = QSpinBox()
-        speed_spin.setRange(0, 2000)
-        speed_spin.setValue(1500)
+        self.speed_spin = QSpinBox()
+        self.speed_spin.setRange(0, 2000)
+        self.speed_spin.setValue(1500)
         ag_layout.addWidget(speed_label)
-        ag_layout.addWidget(speed_spin)
+        ag_layout.addWidget(self.speed_spin)
 
         antenna_group.setLayout(ag_layout)
 
-        # Core widgets
+        # Light widgets now; map and camera get placeholders until their stages run
         self.input_panel = WaypointInput()
-        self.camera_feed = CameraFeed()
-        self.map_viewer = MapViewer()
-        self.map_viewer.setMinimumSize(700, 500)
-        self.map_viewer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.mission_control_viewer = MissionViewer()
         self.viewer_panel = WaypointViewer()
-
-        # Start UDP image receiver for camera feed
-        self.image_receiver = UDPImageReceiver(ip='0.0.0.0', port=5007)
-        self.image_receiver.image_received.connect(self.camera_feed.update_image)
-        self.image_receiver.start()
-        print("[Dashboard] Camera feed receiver started on 192.168.116:5007")
+        self.camera_placeholder = QLabel("Starting camera feed...")
+        self.camera_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.camera_placeholder.setMinimumSize(480, 360)
+        self.map_placeholder = QLabel("Loading map...")
+        self.map_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.map_placeholder.setMinimumSize(700, 500)
+        self.map_placeholder.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
 
         # Left panel composition: antenna controls -> waypoint input -> camera feed
         self.left_panel.addWidget(antenna_group)
         self.left_panel.addWidget(self.input_panel)
-        self.left_panel.addWidget(self.camera_feed)
+        self.left_panel.addWidget(self.camera_placeholder)
         self.left_panel.addStretch()
 
         # Right panel composition: mission viewer -> waypoint viewer -> map
         self.right_panel.addWidget(self.mission_control_viewer)
         self.right_panel.addWidget(self.viewer_panel)
-        self.right_panel.addWidget(self.map_viewer)
+        self.right_panel.addWidget(self.map_placeholder)
         self.right_panel.addStretch()
 
         # Connections between components
         self.input_panel.submitted.connect(self.viewer_panel.add_waypoint)
         self.viewer_panel.mission_pushed.connect(self.mission_control_viewer.update_mission_viewer)
-        self.viewer_panel.mission_pushed.connect(lambda _: self.map_viewer.set_destination_to_latest_waypoint())
-        self.map_viewer.refresh_map.clicked.connect(self.viewer_panel.get_all_mission_data)
-        self.viewer_panel.waypoint_data.connect(self.map_viewer.update_map)
-
-        # Antenna control signal wiring to Teensy
-        left_btn.clicked.connect(lambda: self.teensy.send("LEFT"))
-        right_btn.clicked.connect(lambda: self.teensy.send("RIGHT"))
-        stop_btn.clicked.connect(lambda: self.teensy.send("STOP"))
-        speed_spin.valueChanged.connect(lambda v: self.teensy.send_speed(v))
 
         # Add layouts with stretch factors
         main_panel_layout.addLayout(self.left_panel, 3)
         main_panel_layout.addLayout(self.right_panel, 7)
         self.main_layout.addLayout(main_panel_layout)
 
-    def on_gps_received(self, lat, lon):
-        if self.map_viewer:
-            self.map_viewer.update_current_position(lat, lon)
+    def deferred_stages(self):
+        """(name, callable) pairs to run in order after the window is shown"""
+        return [
+            ("logo", self.load_logo),
+            ("map", self.load_map),
+            ("camera", self.load_camera),
+            ("networking", self.start_networking),
+        ]
+
+    def load_logo(self):
+        for path in LOGO_PATHS:
+            if os.path.exists(path):
+                self.logo_label.setPixmap(circular_pixmap(QPixmap(path), LOGO_SIZE))
+                return
+
+    def load_map(self):
+        from components.mapViewer import MapViewer
+
+        self.map_viewer = MapViewer()
+        self.map_viewer.setMinimumSize(700, 500)
+        self.map_viewer.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.right_panel.replaceWidget(self.map_placeholder, self.map_viewer)
+        self.map_placeholder.deleteLater()
+        self.map_placeholder = None
+
+        self.viewer_panel.mission_pushed.connect(lambda _: self.map_viewer.set_destination_to_latest_waypoint())
+        self.map_viewer.refresh_map.clicked.connect(self.viewer_panel.get_all_mission_data)
+        self.viewer_panel.waypoint_data.connect(self.map_viewer.update_map)
+        hub = TelemetryHub.instance()
+        # Whole batches, so the map can split the fixes per vehicle
+        hub.subscribe(TOPIC_BATCH, self.map_viewer.update_batch)
+        self.map_viewer.set_link_stats(hub.link_stats)
+
+    def load_camera(self):
+        from components.cameraFeed import CameraFeed
+
+        self.camera_feed = CameraFeed()
+        self.left_panel.replaceWidget(self.camera_placeholder, self.camera_feed)
+        self.camera_placeholder.deleteLater()
+        self.camera_placeholder = None
+
+    def start_networking(self):
+        from utility.udp_image_receiver import UDPImageReceiver
+        from utility.teensy_sender import TeensySender
+
+        # Create Teensy sender
+        self.teensy = TeensySender()  # defaults can be changed via self.teensy.set_target(ip, port)
+
+        # Antenna control signal wiring to Teensy
+        for command, button in self.antenna_buttons.items():
+            button.clicked.connect(lambda _, command=command: self.teensy.send(command))
+        self.speed_spin.valueChanged.connect(lambda v: self.teensy.send_speed(v))
+
+        # Start UDP image receiver for camera feed
+        self.image_receiver = UDPImageReceiver(ip='0.0.0.0', port=5007)
+        if self.camera_feed is not None:
+            # Called right on the network loop: frames go to the decode worker without a GUI thread hop
+            self.image_receiver.image_received.connect(
+                self.camera_feed.update_image, Qt.ConnectionType.DirectConnection
+            )
+        self.image_receiver.start()
+        log.info("Camera feed receiver started on port 5007")
+
+        self.viewer_panel.start_listener()
+
+    def shutdown(self):
+        """Stop the background work started by the deferred stages"""
+        if self.map_viewer is not None:
+            self.map_viewer.shutdown()
+        if self.image_receiver is not None:
+            self.image_receiver.stop()
+        if self.camera_feed is not None:
+            self.camera_feed.shutdown()
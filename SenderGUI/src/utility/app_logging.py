@@ -0,0 +1,125 @@
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import deque
+
+ROOT_LOGGER = "sendergui"
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "logs")
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+# Subsystems and their default levels; override with setup_logging(levels=...) or --log
+SUBSYSTEMS = {
+    "net": logging.INFO,
+    "telemetry": logging.INFO,
+    "map": logging.INFO,
+    "tiles": logging.WARNING,
+    "camera": logging.INFO,
+    "mission": logging.INFO,
+    "teensy": logging.INFO,
+    "ui": logging.INFO,
+    "startup": logging.INFO,
+}
+
+
+def get_logger(subsystem):
+    """Logger for one subsystem, e.g. get_logger("net").
+
+    Pass arguments instead of pre-formatting (log.debug("fix %s,%s", lat, lon))
+    so a disabled level costs one level check and no string building.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last capacity records in memory for on-screen inspection or a crash dump"""
+
+    def __init__(self, capacity=5000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self, count=None, level=logging.NOTSET):
+        records = [r for r in list(self.records) if r.levelno >= level]
+        if count is not None:
+            records = records[-count:]
+        return [self.format(r) for r in records]
+
+
+def parse_levels(spec):
+    """Parse "net=DEBUG,map=WARNING" into {"net": 10, "map": 30}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"unknown log level {level!r} for {name!r}")
+        levels[name.strip()] = value
+    return levels
+
+
+class _LoggingState:
+    listener = None
+    ring = None
+    lock = threading.Lock()
+
+
+def setup_logging(level=None, levels=None, log_file=None, ring_size=5000, console=True,
+                  max_bytes=5 * 1024 * 1024, backup_count=5):
+    """Configure the sendergui loggers and return the in-memory RingBufferHandler.
+
+    Loggers only enqueue records; one background thread writes them to the
+    rotating log_file (default logs/dashboard.log) and to the console, so a
+    slow terminal or disk never blocks the GUI or network threads. level
+    sets every subsystem, levels overrides single ones.
+    """
+    with _LoggingState.lock:
+        if _LoggingState.listener is not None:
+            return _LoggingState.ring
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(logging.DEBUG)
+        root.propagate = False
+        for name, default in SUBSYSTEMS.items():
+            get_logger(name).setLevel(level if level is not None else default)
+        for name, value in (levels or {}).items():
+            get_logger(name).setLevel(value)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        if log_file is None:
+            log_file = os.path.join(LOG_DIR, "dashboard.log")
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+            handlers.append(console_handler)
+
+        ring = RingBufferHandler(ring_size)
+        ring.setFormatter(formatter)
+        records = queue.SimpleQueue()
+        # The ring is filled synchronously so it is complete even if the writer thread lags
+        root.addHandler(ring)
+        root.addHandler(logging.handlers.QueueHandler(records))
+        listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        _LoggingState.listener = listener
+        _LoggingState.ring = ring
+        return ring
+
+
+def ring_buffer():
+    return _LoggingState.ring
+
+
+def shutdown_logging():
+    """Flush queued records to their handlers and stop the writer thread"""
+    with _LoggingState.lock:
+        if _LoggingState.listener is not None:
+            _LoggingState.listener.stop()
+            _LoggingState.listener = None
@@ -0,0 +1,283 @@
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from utility.frame_pool import FramePool
+from utility.link_stats import LatencyHistogram
+from utility.app_logging import get_logger
+
+log = get_logger("camera")
+
+STAGE_QUEUE_WAIT = "queue_wait"  # submitted -> picked up by the decoder
+STAGE_DECODE = "decode"          # JPEG -> BGR pixels, at reduced scale when the views allow
+STAGE_SCALE = "scale"            # BGR pixels -> one display-ready image per target
+STAGE_DISPLAY = "display"        # submitted -> shown on the GUI thread
+STAGES = (STAGE_QUEUE_WAIT, STAGE_DECODE, STAGE_SCALE, STAGE_DISPLAY)
+
+# libjpeg can decode at 1/2, 1/4 or 1/8 scale by skipping DCT work, far cheaper than decoding in full
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+# Start-of-frame markers that carry the image size (not DHT, JPG or DAC, which share the range)
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+STANDALONE_MARKERS = set(range(0xD0, 0xDA)) | {0x01}
+
+
+def jpeg_size(data):
+    """Return (width, height) from a JPEG's frame header without decoding it, or None"""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    end = len(data) - 9
+    while i < end:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+        elif marker in STANDALONE_MARKERS:
+            i += 2
+        elif marker in SOF_MARKERS:
+            height, width = struct.unpack_from(">HH", data, i + 5)
+            return width, height
+        else:
+            i += 2 + struct.unpack_from(">H", data, i + 2)[0]
+    return None
+
+
+def fit_size(width, height, box_width, box_height):
+    """Size of a width x height image scaled to fit the box, keeping its aspect ratio"""
+    scale = min(box_width / width, box_height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def reduction_for(width, height, targets):
+    """Largest decode reduction (1, 2, 4 or 8) that still leaves enough pixels for every target"""
+    need_width = need_height = 0
+    for box_width, box_height in targets.values():
+        fit_width, fit_height = fit_size(width, height, box_width, box_height)
+        need_width = max(need_width, fit_width)
+        need_height = max(need_height, fit_height)
+    for factor in (8, 4, 2):
+        # libjpeg rounds reduced sizes up
+        if -(-width // factor) >= need_width and -(-height // factor) >= need_height:
+            return factor
+    return 1
+
+
+class DecodedFrame:
+    """One decoded camera frame, scaled once per display target.
+
+    images maps each target name to a Format_RGB32 QImage that borrows its
+    pixels from the matching FramePool lease in leases. A pixmap made from
+    it shares those pixels too, so a view that shows an image takes its
+    lease out of leases and releases it once the pixmap is replaced;
+    release() hands back the leases nobody took. width and height are the
+    source frame's size, reduction the scale it was decoded at (1, 2, 4 or 8).
+    """
+    __slots__ = ("images", "leases", "width", "height", "reduction", "submitted")
+
+    def __init__(self, width, height, reduction, submitted):
+        self.images = {}
+        self.leases = {}
+        self.width = width
+        self.height = height
+        self.reduction = reduction
+        self.submitted = submitted
+
+    def release(self):
+        for lease in self.leases.values():
+            lease.release()
+        self.leases.clear()
+
+
+class FrameDecoder(QThread):
+    """Decodes and scales camera JPEGs off the GUI thread; the latest frame wins.
+
+    submit() can be called from any thread, so the network loop hands frames
+    over without going through the GUI. Input and output are each a depth-1
+    slot: a JPEG arriving while the previous one still waits replaces it, and
+    a decoded frame the GUI has not picked up yet is replaced by the next, so
+    a slow decoder or a busy GUI thread drops frames instead of falling
+    behind. frame_ready is emitted when the output slot fills; the GUI thread
+    then calls take_frame() and only has to swap in the ready images.
+    targets maps a view name to the (width, height) box it is scaled to fit;
+    the JPEG is decoded at the smallest libjpeg scale that still covers the
+    largest of them, and with no targets (no view visible) frames are not
+    decoded at all. Output images are written into buffers leased from pool
+    and intermediate scales into buffers the worker keeps, so a steady
+    stream allocates no frame-sized arrays beyond the JPEG decode itself.
+    """
+    frame_ready = pyqtSignal()
+
+    def __init__(self, targets=None, pool=None):
+        super().__init__()
+        self.targets = dict(targets or {})
+        self.pool = pool or FramePool()
+        self.scratch = {}  # (width, height) -> BGR buffer for intermediate scales, worker thread only
+        self.running = True
+        self.condition = threading.Condition()
+        self.pending = None
+        self.last_jpeg = None
+        self.ready_lock = threading.Lock()
+        self.ready = None
+
+        self.stats_lock = threading.Lock()
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.submitted = 0
+        self.decoded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.reductions = {factor: 0 for factor in DECODE_FLAGS}
+        self.dropped_waiting = 0
+        self.dropped_undisplayed = 0
+        self.displayed = 0
+
+    def submit(self, jpeg):
+        """Queue a JPEG for decoding, replacing any that is still waiting; safe from any thread"""
+        with self.condition:
+            if self.pending is not None:
+                self.dropped_waiting += 1
+            self.pending = (jpeg, time.monotonic())
+            self.submitted += 1
+            self.condition.notify()
+
+    def set_targets(self, targets):
+        """Change the views frames are scaled for; the last frame is decoded again for a new view"""
+        with self.condition:
+            added = set(targets) - set(self.targets)
+            self.targets = dict(targets)
+            if added and self.pending is None and self.last_jpeg is not None:
+                self.pending = (self.last_jpeg, time.monotonic())
+                self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                (jpeg, submitted), self.pending = self.pending, None
+                self.last_jpeg = jpeg
+                targets = dict(self.targets)
+            if not targets:
+                # Nothing on screen wants the frame; set_targets() decodes the last one once something does
+                with self.stats_lock:
+                    self.skipped += 1
+                continue
+            started = time.monotonic()
+            frame = self.decode(jpeg, targets, submitted)
+            if frame is None:
+                continue
+            with self.stats_lock:
+                self.histograms[STAGE_QUEUE_WAIT].add((started - submitted) * 1000)
+            with self.ready_lock:
+                replaced, self.ready = self.ready, frame
+            if replaced is not None:
+                replaced.release()
+                self.dropped_undisplayed += 1
+            else:
+                self.frame_ready.emit()
+
+    def decode(self, jpeg, targets, submitted=None):
+        """Decode one JPEG and scale it for each target; returns a DecodedFrame or None if undecodable"""
+        start = time.perf_counter()
+        size = jpeg_size(jpeg)
+        reduction = reduction_for(size[0], size[1], targets) if size and targets else 1
+        image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), DECODE_FLAGS[reduction])
+        decoded = time.perf_counter()
+        if image is None:
+            self.failed += 1
+            log.debug("Could not decode a %d byte frame", len(jpeg))
+            return None
+        height, width = image.shape[:2]
+        if size is None:
+            size = (width, height)
+        frame = DecodedFrame(size[0], size[1], reduction, submitted if submitted is not None else time.monotonic())
+        # Largest view first, so each smaller one is scaled down from the previous result instead of the full frame
+        source = image
+        for name, box in sorted(targets.items(), key=lambda item: item[1][0] * item[1][1], reverse=True):
+            target_size = fit_size(width, height, *box)
+            if target_size != (source.shape[1], source.shape[0]):
+                scratch = self.scratch.get(target_size)
+                if scratch is None:
+                    if len(self.scratch) >= len(targets) + 2:
+                        self.scratch.clear()
+                    scratch = self.scratch[target_size] = np.empty((target_size[1], target_size[0], 3), np.uint8)
+                # Bilinear: smoother than Qt's default fast scaling, and far cheaper than area averaging
+                source = cv2.resize(source, target_size, dst=scratch, interpolation=cv2.INTER_LINEAR)
+            # BGRA is Format_RGB32 in memory, the raster pixmap format, so QPixmap.fromImage is free on
+            # the GUI thread; Format_BGR888 would skip this pass here only to convert there instead
+            lease = self.pool.acquire((source.shape[0], source.shape[1], 4))
+            cv2.cvtColor(source, cv2.COLOR_BGR2BGRA, dst=lease.array)
+            frame.leases[name] = lease
+            frame.images[name] = lease.qimage(QImage.Format.Format_RGB32)
+        done = time.perf_counter()
+        with self.stats_lock:
+            self.decoded += 1
+            self.reductions[reduction] += 1
+            self.histograms[STAGE_DECODE].add((decoded - start) * 1000)
+            self.histograms[STAGE_SCALE].add((done - decoded) * 1000)
+        return frame
+
+    def take_frame(self):
+        """Remove and return the newest decoded frame, or None (GUI thread); the caller releases it"""
+        with self.ready_lock:
+            frame, self.ready = self.ready, None
+        return frame
+
+    def mark_displayed(self, frame):
+        with self.stats_lock:
+            self.displayed += 1
+            self.histograms[STAGE_DISPLAY].add((time.monotonic() - frame.submitted) * 1000)
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "submitted": self.submitted,
+                "decoded": self.decoded,
+                "displayed": self.displayed,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "reductions": dict(self.reductions),
+                "dropped_waiting": self.dropped_waiting,
+                "dropped_undisplayed": self.dropped_undisplayed,
+                "pool": self.pool.stats(),
+                "latency": {stage: h.summary() for stage, h in self.histograms.items()},
+            }
+
+    def format_stats(self):
+        """One-line summary for the camera overlay"""
+        stats = self.stats()
+        parts = []
+        for label, stage in (("decode", STAGE_DECODE), ("wait", STAGE_QUEUE_WAIT), ("to screen", STAGE_DISPLAY)):
+            summary = stats["latency"][stage]
+            if summary:
+                parts.append(f"{label} p50 {summary['p50']:.1f} ms")
+        reductions = [f"1/{factor}" for factor, count in stats["reductions"].items() if count and factor > 1]
+        if reductions:
+            parts.append("decoded at " + ", ".join(reductions))
+        dropped = stats["dropped_waiting"] + stats["dropped_undisplayed"]
+        parts.append(f"dropped {dropped}/{stats['submitted']}")
+        if stats["pool"]["overflow"]:
+            parts.append(f"pool overflow {stats['pool']['overflow']}")
+        return " | ".join(parts)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.pending = None
+            self.condition.notify()
+        self.wait()
+        frame = self.take_frame()
+        if frame is not None:
+            frame.release()
@@ -0,0 +1,100 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+
+class FrameLease:
+    """One buffer borrowed from a FramePool.
+
+    array is the buffer to write pixels into. A QImage from qimage(), and a
+    QPixmap made from that image, read straight from it, so release() the
+    lease only once nothing on screen shows it any more. release() may be
+    called more than once.
+    """
+    __slots__ = ("pool", "key", "array", "pooled")
+
+    def __init__(self, pool, key, array, pooled):
+        self.pool = pool
+        self.key = key
+        self.array = array
+        self.pooled = pooled
+
+    def qimage(self, image_format):
+        """QImage that borrows the leased buffer (no copy); valid until release()"""
+        array = self.array
+        return QImage(array.data, array.shape[1], array.shape[0], array.strides[0], image_format)
+
+    def release(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool._release(self)
+
+
+class FramePool:
+    """A fixed set of reusable frame buffers, handed out as leases.
+
+    Buffers are grouped by shape, with at most buffers_per_shape of each, so
+    a steady stream settles on a few buffers per view that are written over
+    frame after frame instead of allocating new ones. When every buffer of a
+    shape is out on lease, acquire() hands out a one-off buffer that is not
+    kept (counted as overflow), so a consumer that holds leases too long
+    shows up in the stats rather than as a stall or an overwritten frame.
+    Only the max_shapes most recently used shapes are kept; a change of
+    stream resolution or window size retires the old buffers as their
+    leases come back. Safe to use from any thread.
+    """
+
+    def __init__(self, buffers_per_shape=4, max_shapes=4):
+        self.buffers_per_shape = buffers_per_shape
+        self.max_shapes = max_shapes
+        self.lock = threading.Lock()
+        self.free = OrderedDict()  # (shape, dtype) -> buffers ready to lease
+        self.created = {}          # (shape, dtype) -> pooled buffers allocated so far
+        self.allocated = 0
+        self.reused = 0
+        self.overflow = 0
+        self.leased = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Lease a buffer of the given shape; its contents are whatever the last user left"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self.lock:
+            free = self.free.get(key)
+            if free is None:
+                free = self.free[key] = []
+                self.created[key] = 0
+                while len(self.free) > self.max_shapes:
+                    old, _ = self.free.popitem(last=False)
+                    del self.created[old]
+            else:
+                self.free.move_to_end(key)
+            self.leased += 1
+            if free:
+                self.reused += 1
+                return FrameLease(self, key, free.pop(), True)
+            pooled = self.created[key] < self.buffers_per_shape
+            if pooled:
+                self.created[key] += 1
+                self.allocated += 1
+            else:
+                self.overflow += 1
+        return FrameLease(self, key, np.empty(shape, dtype), pooled)
+
+    def _release(self, lease):
+        with self.lock:
+            self.leased -= 1
+            free = self.free.get(lease.key)
+            if lease.pooled and free is not None and len(free) < self.buffers_per_shape:
+                free.append(lease.array)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "shapes": len(self.free),
+                "allocated": self.allocated,
+                "reused": self.reused,
+                "overflow": self.overflow,
+                "leased": self.leased,
+            }
@@ -0,0 +1,178 @@
+import struct
+import time
+
+CHUNK_MAGIC = b"SGIC"
+CHUNK_VERSION = 1
+# magic, version, flags, chunk_index, chunk_count, reserved, frame_id, frame_size, offset of this chunk's payload
+CHUNK_HEADER = struct.Struct("<4sBBHHHIII")
+# Header plus payload stays under a 1500-byte Ethernet/Wi-Fi MTU, so no chunk is IP-fragmented
+CHUNK_PAYLOAD = 1400 - CHUNK_HEADER.size
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+FRAME_ID_MASK = 0xFFFFFFFF
+# A frame ID this far behind the last completed one is a restarted sender, not a late chunk
+RESYNC_DISTANCE = 256
+
+
+def is_chunk(data):
+    return data[:4] == CHUNK_MAGIC
+
+
+def encode_chunks(frame_id, data, chunk_payload=CHUNK_PAYLOAD):
+    """Split one encoded frame into datagrams of at most chunk_payload bytes plus header"""
+    count = max(1, -(-len(data) // chunk_payload))
+    if count > 0xFFFF:
+        raise ValueError(f"{len(data)} byte frame needs more than 65535 chunks")
+    frame_id &= FRAME_ID_MASK
+    view = memoryview(data)
+    return [
+        CHUNK_HEADER.pack(CHUNK_MAGIC, CHUNK_VERSION, 0, index, count, 0, frame_id, len(data), offset)
+        + view[offset:offset + chunk_payload]
+        for index, offset in enumerate(range(0, max(len(data), 1), chunk_payload))
+    ]
+
+
+def decode_chunk(data):
+    """Return (frame_id, chunk_index, chunk_count, frame_size, offset, payload) of one chunk datagram.
+
+    Raises ValueError for a truncated or inconsistent chunk or an unknown version.
+    """
+    if len(data) < CHUNK_HEADER.size:
+        raise ValueError(f"image chunk too short ({len(data)} bytes)")
+    _, version, _, index, count, _, frame_id, frame_size, offset = CHUNK_HEADER.unpack_from(data)
+    if version != CHUNK_VERSION:
+        raise ValueError(f"unsupported image chunk version {version}")
+    payload = memoryview(data)[CHUNK_HEADER.size:]
+    if not count or index >= count or frame_size > MAX_FRAME_SIZE or offset + len(payload) > frame_size:
+        raise ValueError(f"inconsistent image chunk {index}/{count} of frame {frame_id}")
+    return frame_id, index, count, frame_size, offset, payload
+
+
+def _newer(a, b):
+    """True if frame ID a comes after b, allowing for wrap-around"""
+    return 0 < ((a - b) & FRAME_ID_MASK) < 0x80000000
+
+
+class _PartialFrame:
+    __slots__ = ("buffer", "count", "received", "missing", "started")
+
+    def __init__(self, size, count, started):
+        self.buffer = bytearray(size)
+        self.count = count
+        self.received = bytearray(count)
+        self.missing = count
+        self.started = started
+
+
+class FrameAssembler:
+    """Reassembles chunked frames with a bounded buffer.
+
+    At most max_frames partial frames and max_bytes of frame buffers are held;
+    when either limit is hit the oldest partial frame is dropped. A partial
+    frame that has not completed within timeout seconds is dropped, and so is
+    every older partial frame once a newer one completes, since a live view
+    never shows them. Late chunks of frames already completed or dropped are
+    counted as late and ignored, unless the ID jumped back by RESYNC_DISTANCE
+    or more: that is a restarted sender counting from 0 again, so the
+    assembler resyncs to it instead of discarding its frames until the IDs
+    climb past the old ones. The counters say how many
+    frames completed, why the others were dropped and how often it resynced.
+    """
+
+    def __init__(self, max_frames=8, max_bytes=64 * 1024 * 1024, timeout=0.5):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.partial = {}
+        self.buffered_bytes = 0
+        self.last_done = None
+        self.completed = 0
+        self.dropped_timeout = 0
+        self.dropped_overflow = 0
+        self.dropped_superseded = 0
+        self.late_chunks = 0
+        self.duplicate_chunks = 0
+        self.invalid_chunks = 0
+        self.resyncs = 0
+
+    def add(self, data, now=None):
+        """Feed one chunk datagram; returns the frame's bytes when this chunk completes it, else None"""
+        if now is None:
+            now = time.monotonic()
+        try:
+            frame_id, index, count, frame_size, offset, payload = decode_chunk(data)
+        except ValueError:
+            self.invalid_chunks += 1
+            return None
+        self.expire(now)
+        frame = self.partial.get(frame_id)
+        if frame is None:
+            if self.last_done is not None and not _newer(frame_id, self.last_done):
+                if (self.last_done - frame_id) & FRAME_ID_MASK >= RESYNC_DISTANCE:
+                    self.resync()
+                else:
+                    self.late_chunks += 1
+                    return None
+            while self.partial and (len(self.partial) >= self.max_frames
+                                    or self.buffered_bytes + frame_size > self.max_bytes):
+                self._drop(min(self.partial, key=lambda key: self.partial[key].started))
+                self.dropped_overflow += 1
+            frame = self.partial[frame_id] = _PartialFrame(frame_size, count, now)
+            self.buffered_bytes += frame_size
+        elif count != frame.count or frame_size != len(frame.buffer):
+            self.invalid_chunks += 1
+            return None
+        if frame.received[index]:
+            self.duplicate_chunks += 1
+            return None
+        frame.received[index] = 1
+        frame.missing -= 1
+        frame.buffer[offset:offset + len(payload)] = payload
+        if frame.missing:
+            return None
+        self._drop(frame_id)
+        self.completed += 1
+        self.last_done = frame_id
+        for older in [key for key in self.partial if _newer(frame_id, key)]:
+            self._drop(older)
+            self.dropped_superseded += 1
+        return bytes(frame.buffer)
+
+    def expire(self, now=None):
+        """Drop partial frames older than timeout; also called on every chunk"""
+        if now is None:
+            now = time.monotonic()
+        for frame_id in [key for key, frame in self.partial.items() if now - frame.started > self.timeout]:
+            self._drop(frame_id)
+            self.dropped_timeout += 1
+
+    def resync(self):
+        """Forget the partial frames and the last completed ID, so any frame ID is accepted next"""
+        self.partial.clear()
+        self.buffered_bytes = 0
+        self.last_done = None
+        self.resyncs += 1
+
+    def _drop(self, frame_id):
+        frame = self.partial.pop(frame_id)
+        self.buffered_bytes -= len(frame.buffer)
+        # A dropped frame's stragglers count as late, not as the start of a new frame
+        if self.last_done is None or _newer(frame_id, self.last_done):
+            self.last_done = frame_id
+
+    def dropped(self):
+        return self.dropped_timeout + self.dropped_overflow + self.dropped_superseded
+
+    def stats(self):
+        return {
+            "completed": self.completed,
+            "dropped": self.dropped(),
+            "dropped_timeout": self.dropped_timeout,
+            "dropped_overflow": self.dropped_overflow,
+            "dropped_superseded": self.dropped_superseded,
+            "late_chunks": self.late_chunks,
+            "duplicate_chunks": self.duplicate_chunks,
+            "invalid_chunks": self.invalid_chunks,
+            "resyncs": self.resyncs,
+            "partial_frames": len(self.partial),
+            "buffered_bytes": self.buffered_bytes,
+        }
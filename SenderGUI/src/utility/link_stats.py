@@ -0,0 +1,218 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Stages a telemetry packet is timed through, in order
+STAGE_ONE_WAY = "one_way"  # sender timestamp -> receive (needs synchronized clocks)
+STAGE_PARSE = "parse"      # receive -> parsed, on the network loop
+STAGE_QUEUE = "queue"      # receive -> handed to the GUI thread (frame coalescing + Qt queue)
+STAGE_PAINT = "paint"      # handed to the GUI thread -> painted on the map
+STAGE_TOTAL = "total"      # receive -> painted on the map
+STAGES = (STAGE_ONE_WAY, STAGE_PARSE, STAGE_QUEUE, STAGE_PAINT, STAGE_TOTAL)
+
+HISTOGRAM_MIN_MS = 0.001
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_BUCKETS = int(math.log(100000 / HISTOGRAM_MIN_MS, HISTOGRAM_GROWTH)) + 2
+HISTOGRAM_BOUNDS = [HISTOGRAM_MIN_MS * HISTOGRAM_GROWTH ** i for i in range(HISTOGRAM_BUCKETS)]
+
+# A seq this far below the expected one means the sender restarted, not that a packet arrived late
+SEQ_RESTART_DISTANCE = 1000
+# How many recent seqs per source are remembered to tell duplicates from late packets
+SEQ_WINDOW = 1024
+
+
+class LatencyHistogram:
+    """Fixed log-spaced histogram of latencies in milliseconds.
+
+    Buckets grow by about 10% from 1 us to 100 s, so percentiles are accurate
+    to within a bucket while add() stays O(log buckets) with no allocation.
+    """
+    def __init__(self):
+        self.counts = [0] * (HISTOGRAM_BUCKETS + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(HISTOGRAM_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        target = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(HISTOGRAM_BOUNDS[min(i, HISTOGRAM_BUCKETS - 1)], self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return None
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class LinkStats:
+    """Latency, rate and loss statistics for one telemetry link.
+
+    The listener calls record_packet() on the network loop as each packet is
+    parsed; the GUI thread calls record_delivery() when a batch reaches it
+    and record_paint() once the map has painted it. When packets carry a
+    sender 'timestamp' the one-way delay is recorded, and a 'seq' field is
+    used to count lost, reordered and duplicate packets and to log gaps. A
+    seq far below the expected one is taken as a sender restart: counting
+    resumes from it instead of treating the rest of the run as reordered.
+    """
+
+    def __init__(self, max_gaps=100, max_awaiting_paint=10000):
+        self.lock = threading.Lock()
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.arrivals = deque()  # monotonic receive times within the last second
+        self.packets = 0
+        self.expected_seq = {}
+        self.recent_seq = {}  # source -> (set, deque) of the last SEQ_WINDOW seqs seen
+        self.lost = 0
+        self.reordered = 0
+        self.duplicates = 0
+        self.restarts = 0
+        self.sequenced = 0
+        self.gaps = deque(maxlen=max_gaps)
+        self.awaiting_paint = deque(maxlen=max_awaiting_paint)
+        self.started = time.monotonic()
+
+    def record_packet(self, received, parsed, fields, source=None, received_wall=None):
+        """Account for one parsed packet; received and parsed are time.monotonic() stamps"""
+        with self.lock:
+            self.packets += 1
+            self.arrivals.append(received)
+            while self.arrivals and received - self.arrivals[0] > 1.0:
+                self.arrivals.popleft()
+            self.histograms[STAGE_PARSE].add((parsed - received) * 1000)
+            if not fields:
+                return
+            sent = fields.get("timestamp")
+            if isinstance(sent, (int, float)) and sent > 0:
+                if received_wall is None:
+                    received_wall = time.time() - (parsed - received)
+                delay = received_wall - sent
+                # Anything wildly off is a sender clock or unit problem, not link delay
+                if -1.0 < delay < 3600.0:
+                    self.histograms[STAGE_ONE_WAY].add(max(0.0, delay) * 1000)
+            seq = fields.get("seq")
+            if isinstance(seq, int):
+                self.sequenced += 1
+                self._track_seq(source, seq)
+
+    def _track_seq(self, source, seq):
+        expected = self.expected_seq.get(source)
+        if expected is None or seq == expected:
+            self.expected_seq[source] = seq + 1
+        elif seq > expected:
+            self.lost += seq - expected
+            self.gaps.append({"source": source, "first": expected, "last": seq - 1, "time": time.time()})
+            self.expected_seq[source] = seq + 1
+        elif expected - seq > SEQ_RESTART_DISTANCE:
+            self.restarts += 1
+            self.recent_seq.pop(source, None)
+            self.expected_seq[source] = seq + 1
+        elif seq in self.recent_seq.get(source, ((), None))[0]:
+            self.duplicates += 1
+            return
+        else:
+            # Late packet: it was counted lost when the gap opened
+            self.reordered += 1
+            if self.lost:
+                self.lost -= 1
+        seen, order = self.recent_seq.setdefault(source, (set(), deque()))
+        seen.add(seq)
+        order.append(seq)
+        if len(order) > SEQ_WINDOW:
+            seen.discard(order.popleft())
+
+    def record_delivery(self, received_times):
+        """Called on the GUI thread with the receive stamps of the fixes in a delivered batch"""
+        now = time.monotonic()
+        with self.lock:
+            queue = self.histograms[STAGE_QUEUE]
+            for received in received_times:
+                queue.add((now - received) * 1000)
+                self.awaiting_paint.append((received, now))
+
+    def record_paint(self):
+        """Called from the map's paint; closes the trace of every fix delivered since the last paint"""
+        if not self.awaiting_paint:
+            return
+        now = time.monotonic()
+        with self.lock:
+            paint = self.histograms[STAGE_PAINT]
+            total = self.histograms[STAGE_TOTAL]
+            while self.awaiting_paint:
+                received, delivered = self.awaiting_paint.popleft()
+                paint.add((now - delivered) * 1000)
+                total.add((now - received) * 1000)
+
+    def packets_per_second(self):
+        with self.lock:
+            now = time.monotonic()
+            while self.arrivals and now - self.arrivals[0] > 1.0:
+                self.arrivals.popleft()
+            return len(self.arrivals)
+
+    def snapshot(self):
+        """Current statistics as a plain dict (latencies in ms)"""
+        rate = self.packets_per_second()
+        with self.lock:
+            sequenced = self.sequenced + self.lost
+            return {
+                "packets": self.packets,
+                "packets_per_second": rate,
+                "lost": self.lost,
+                "loss_rate": self.lost / sequenced if sequenced else None,
+                "reordered": self.reordered,
+                "duplicates": self.duplicates,
+                "restarts": self.restarts,
+                "gaps": list(self.gaps),
+                "latency": {stage: h.summary() for stage, h in self.histograms.items()},
+            }
+
+    def format_overlay(self):
+        """One-line summary for the map overlay"""
+        snap = self.snapshot()
+        parts = [f"{snap['packets_per_second']} pkt/s"]
+        total = snap["latency"][STAGE_TOTAL]
+        if total:
+            parts.append(f"rx→paint p50 {total['p50']:.1f} / p99 {total['p99']:.1f} ms")
+        one_way = snap["latency"][STAGE_ONE_WAY]
+        if one_way:
+            parts.append(f"one-way p50 {one_way['p50']:.1f} ms")
+        if snap["loss_rate"] is not None:
+            parts.append(f"loss {snap['loss_rate'] * 100:.2f}% ({len(snap['gaps'])} gaps)")
+        return " | ".join(parts)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+            self.packets = 0
+            self.lost = 0
+            self.reordered = 0
+            self.duplicates = 0
+            self.restarts = 0
+            self.sequenced = 0
+            self.expected_seq.clear()
+            self.recent_seq.clear()
+            self.gaps.clear()
+            self.awaiting_paint.clear()
@@ -1,71 +1,281 @@
-import socket
 import json
-from PyQt6.QtCore import QThread, pyqtSignal
+import threading
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
 
+from utility.network_core import NetworkCore
+from utility.telemetry_frame import is_binary_frame, decode_frame
+from utility.app_logging import get_logger
 
-class UDPListener(QThread):
+log = get_logger("telemetry")
+
+# Packets without a vehicle_id (CSV, older senders) belong to this vehicle
+DEFAULT_VEHICLE = 0
+
+
+def parse_packet(data):
+    """Decode a telemetry datagram into (fields dict or None, (lat, lon) or None).
+
+    Accepts a binary frame (see utility.telemetry_frame), a JSON object (with
+    optional 'lat'/'lon' and 'dest_lat'/'dest_lon' keys) or plain "lat,lon"
+    text. Malformed input raises UnicodeDecodeError, ValueError, TypeError or KeyError.
+    """
+    if is_binary_frame(data):
+        fields = decode_frame(data)
+        return fields, (fields["lat"], fields["lon"])
+    decoded_string = data.decode('utf-8').strip()
+    if decoded_string[:1] not in "{[":
+        # Not JSON, so skip the failing json.loads and its exception
+        if ',' in decoded_string:
+            parts = decoded_string.split(",")
+            if len(parts) == 2:
+                return None, (float(parts[0].strip()), float(parts[1].strip()))
+        return None, None
+    try:
+        decoded_data = json.loads(decoded_string)
+    except json.JSONDecodeError:
+        return None, None
+    if not isinstance(decoded_data, dict):
+        return None, None
+    # Vehicle IDs key per-vehicle state downstream, so a list or object here would fail far from the socket
+    if not isinstance(decoded_data.get("vehicle_id", DEFAULT_VEHICLE), (int, str)):
+        raise TypeError(f"bad vehicle_id {decoded_data['vehicle_id']!r}")
+    if 'dest_lat' in decoded_data or 'dest_lon' in decoded_data:
+        # Checked here like lat/lon, so a bad destination is a malformed packet rather than a failing map update
+        decoded_data['dest_lat'] = float(decoded_data['dest_lat'])
+        decoded_data['dest_lon'] = float(decoded_data['dest_lon'])
+    if 'lat' in decoded_data and 'lon' in decoded_data:
+        return decoded_data, (float(decoded_data['lat']), float(decoded_data['lon']))
+    return decoded_data, None
+
+
+def vehicle_id_of(fields):
+    if fields is None:
+        return DEFAULT_VEHICLE
+    return fields.get("vehicle_id", DEFAULT_VEHICLE)
+
+
+class TelemetryBatch:
+    """Telemetry gathered between two UI deliveries.
+
+    fixes holds every (lat, lon, receive timestamp) in arrival order, fields
+    the latest value of each JSON key seen, and packets the number of
+    datagrams folded into the batch. received holds the time.monotonic()
+    receive stamp of each fix, for latency tracing. vehicles holds the
+    vehicle ID of each fix and vehicle_fields the latest fields per vehicle,
+    so multi-vehicle consumers can split the batch with by_vehicle().
+    """
+    __slots__ = ("fixes", "fields", "packets", "received", "vehicles", "vehicle_fields")
+
+    def __init__(self):
+        self.fixes = []
+        self.fields = {}
+        self.packets = 0
+        self.received = []
+        self.vehicles = []
+        self.vehicle_fields = {}
+
+    def add_packet(self, fields, gps, timestamp, received):
+        vehicle = vehicle_id_of(fields)
+        self.packets += 1
+        if fields is not None:
+            self.fields.update(fields)
+            self.vehicle_fields.setdefault(vehicle, {}).update(fields)
+        if gps is not None:
+            self.fixes.append((gps[0], gps[1], timestamp))
+            self.received.append(received)
+            self.vehicles.append(vehicle)
+
+    def merge(self, other):
+        self.fixes.extend(other.fixes)
+        self.fields.update(other.fields)
+        self.packets += other.packets
+        self.received.extend(other.received)
+        self.vehicles.extend(other.vehicles)
+        for vehicle, fields in other.vehicle_fields.items():
+            self.vehicle_fields.setdefault(vehicle, {}).update(fields)
+
+    def drop_oldest(self, count):
+        del self.fixes[:count]
+        del self.received[:count]
+        del self.vehicles[:count]
+
+    def latest_fix(self):
+        return self.fixes[-1] if self.fixes else None
+
+    def by_vehicle(self):
+        """Split the fixes into {vehicle ID: [(lat, lon, timestamp), ...]}, each in arrival order"""
+        groups = {}
+        for vehicle, fix in zip(self.vehicles, self.fixes):
+            fixes = groups.get(vehicle)
+            if fixes is None:
+                groups[vehicle] = [fix]
+            else:
+                fixes.append(fix)
+        return groups
+
+
+class PendingBatch:
+    """The one TelemetryBatch waiting for the GUI thread, shared by the telemetry sources.
+
+    put() is called by the producing thread: the first batch fills the slot
+    and the caller should then queue a delivery; later ones merge into the
+    waiting batch, keeping its newest max_pending_fixes fixes (counted in
+    dropped). take() empties the slot on the GUI thread. coalesced counts
+    packets that shared a delivery with others. Safe to use from any thread.
+    """
+
+    def __init__(self, max_pending_fixes=4096):
+        self.max_pending_fixes = max_pending_fixes
+        self.lock = threading.Lock()
+        self.batch = None
+        self.coalesced = 0
+        self.dropped = 0
+        self.deliveries = 0
+
+    def put(self, batch):
+        """Store or merge batch; True if the slot was empty and a delivery must be queued"""
+        with self.lock:
+            if self.batch is None:
+                self.batch = batch
+                notify = True
+            else:
+                self.batch.merge(batch)
+                notify = False
+            overflow = len(self.batch.fixes) - self.max_pending_fixes
+            if overflow > 0:
+                # GUI thread has fallen far behind: keep the newest fixes
+                self.batch.drop_oldest(overflow)
+                self.dropped += overflow
+        return notify
+
+    def take(self):
+        """Remove and return the waiting batch, or None"""
+        with self.lock:
+            batch, self.batch = self.batch, None
+            if batch is not None:
+                self.deliveries += 1
+                self.coalesced += batch.packets - 1
+        return batch
+
+    def stats(self):
+        return {"coalesced": self.coalesced, "dropped": self.dropped, "deliveries": self.deliveries}
+
+
+class UDPListener(QObject):
+    """Receives telemetry datagrams and hands them to the GUI thread in batches.
+
+    The socket is an endpoint on the shared NetworkCore loop, which drains it
+    without blocking; packets are parsed there too. At most one batch is
+    queued to the GUI at a time and no more often than frame_interval:
+    whatever arrives while a batch is waiting is merged into it. On the GUI
+    thread each delivery emits batch_received with every fix, then
+    data_received with the latest fields and gps_data_received with the
+    latest fix.
+    """
     gps_data_received = pyqtSignal(float, float)
     data_received = pyqtSignal(dict)
+    batch_received = pyqtSignal(object)
+    _batch_ready = pyqtSignal()
 
-    def __init__(self, ip="0.0.0.0", port=5005):
+    def __init__(self, ip="0.0.0.0", port=5005, recorder=None, frame_interval=1 / 60,
+                 max_pending_fixes=4096, link_stats=None):
         super().__init__()
         self.ip = ip
         self.port = port
-        self.running = True
-        self.sock = None
+        # Optional TelemetryRecorder that keeps every raw datagram for later replay
+        self.recorder = recorder
+        self.frame_interval = frame_interval
+        # Optional LinkStats that traces each packet from receive to paint
+        self.link_stats = link_stats
+        self.core = NetworkCore.instance()
+        self.endpoint = None
 
-    def run(self):
-        try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            
-            # Allow address reuse
-            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            
-            self.sock.bind((self.ip, self.port))
-            self.sock.settimeout(1.0)
-
-            print(f"✓ Listening for UDP on {self.ip}:{self.port}...")
-
-            while self.running:
-                try:
-                    # FIX: Changed from self.recvfrom to self.sock.recvfrom
-                    data, addr = self.sock.recvfrom(1024)
-                    decoded_string = data.decode('utf-8').strip()
-                    print(f"UDP received: {decoded_string}")
-                    
-                    try:
-                        decoded_data = json.loads(decoded_string)
-                        self.data_received.emit(decoded_data)
-                        
-                        if 'lat' in decoded_data and 'lon' in decoded_data:
-                            lat = float(decoded_data['lat'])
-                            lon = float(decoded_data['lon'])
-                            print(f"→ GPS: Lat={lat}, Lon={lon}")
-                            self.gps_data_received.emit(lat, lon)
-                            
-                    except json.JSONDecodeError:
-                        if ',' in decoded_string:
-                            parts = decoded_string.split(",")
-                            if len(parts) == 2:
-                                lat = float(parts[0].strip())
-                                lon = float(parts[1].strip())
-                                print(f"→ GPS: Lat={lat}, Lon={lon}")
-                                self.gps_data_received.emit(lat, lon)
-                        
-                except socket.timeout:
-                    continue
-                except Exception as e:
-                    if self.running:
-                        print(f"UDP Error: {e}")
+        self._pending = TelemetryBatch()
+        self._publish_handle = None
+        self._next_delivery = 0.0
+        self.ready = PendingBatch(max_pending_fixes)
+        self.received = 0
+        self.malformed = 0
+        self._batch_ready.connect(self._deliver)
 
+    def start(self):
+        try:
+            # Room for a burst while the loop is busy
+            self.endpoint = self.core.open_endpoint(
+                self._on_datagram, (self.ip, self.port), on_closed=self._on_closed, recv_buffer=1 << 20
+            )
         except OSError as e:
-            print(f"Failed to bind to port {self.port}: {e}")
-        finally:
-            if self.sock:
-                self.sock.close()
-                print("UDP listener stopped")
+            log.error("Failed to bind to port %s: %s", self.port, e)
+            return
+        log.info("Listening for UDP on %s:%s", self.ip, self.port)
+
+    def _on_datagram(self, data, addr):
+        # Loop thread
+        received = time.monotonic()
+        timestamp = time.time()
+        self.received += 1
+        if self.recorder is not None:
+            self.recorder.record(data, timestamp)
+        try:
+            fields, gps = parse_packet(data)
+        except (UnicodeDecodeError, ValueError, TypeError, KeyError):
+            self.malformed += 1
+            return
+        if self.link_stats is not None:
+            self.link_stats.record_packet(received, time.monotonic(), fields, addr, timestamp)
+        self._pending.add_packet(fields, gps, timestamp, received)
+        if self._publish_handle is None:
+            delay = max(0.0, self._next_delivery - time.monotonic())
+            self._publish_handle = self.core.call_later(delay, self._flush)
+
+    def _flush(self):
+        # Loop thread, at most once per frame_interval
+        self._publish_handle = None
+        batch, self._pending = self._pending, TelemetryBatch()
+        self._next_delivery = time.monotonic() + self.frame_interval
+        if batch.packets:
+            self._publish(batch)
+
+    def _on_closed(self):
+        if self._publish_handle is not None:
+            self._publish_handle.cancel()
+            self._publish_handle = None
+        log.info("UDP listener on port %s stopped: %s", self.port, self.stats())
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _publish(self, batch):
+        """Hand batch to the GUI thread, merging it into the one still waiting there if any"""
+        if self.ready.put(batch):
+            self._batch_ready.emit()
+
+    def take_batch(self):
+        """Remove and return the waiting batch, or None"""
+        return self.ready.take()
+
+    def _deliver(self):
+        # Runs on the GUI thread (this QObject lives there), once per queued notification
+        batch = self.take_batch()
+        if batch is None:
+            return
+        if self.link_stats is not None:
+            self.link_stats.record_delivery(batch.received)
+        self.batch_received.emit(batch)
+        if batch.fields:
+            self.data_received.emit(dict(batch.fields))
+        fix = batch.latest_fix()
+        if fix is not None:
+            self.gps_data_received.emit(fix[0], fix[1])
+
+    def stats(self):
+        return {"received": self.received, "malformed": self.malformed, **self.ready.stats()}
 
     def stop(self):
-        self.running = False
-        if self.sock:
-            self.sock.close()
\ No newline at end of file
+        if self.endpoint is not None:
+            self.endpoint.close()
+
+    def wait(self, timeout=1.0):
+        """Block until the socket is closed and the recorder flushed"""
+        if self.endpoint is not None:
+            self.endpoint.wait(timeout)
@@ -0,0 +1,116 @@
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from utility.app_logging import get_logger
+
+log = get_logger("map")
+
+
+def pil_to_qimage(image):
+    """Convert a PIL image to a QImage with a single copy of its pixels.
+
+    PIL does not expose its pixel storage as one contiguous buffer, so
+    tobytes() copies the pixels out once; the QImage then borrows that
+    bytes object instead of copying it again. The bytes are pinned on the
+    returned wrapper; convert it to a QPixmap (or copy() it) before dropping
+    the wrapper.
+    """
+    if image.mode == "RGB":
+        image_format = QImage.Format.Format_RGB888
+        bytes_per_pixel = 3
+    else:
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        image_format = QImage.Format.Format_RGBA8888
+        bytes_per_pixel = 4
+    buffer = image.tobytes()
+    width, height = image.size
+    qimage = QImage(buffer, width, height, width * bytes_per_pixel, image_format)
+    qimage.buffer = buffer
+    return qimage
+
+
+class MapRenderWorker(QThread):
+    """Loads map tiles and renders map snapshots off the GUI thread.
+
+    Only the newest request of each kind is kept. A new tile request supersedes
+    the one in flight: the worker abandons the old list at the next tile
+    boundary. A render that is overtaken by a newer request is thrown away
+    instead of being emitted. Tiles and renders are handed back as QImage,
+    which is safe to build outside the GUI thread; renders never touch disk.
+    """
+    tile_ready = pyqtSignal(int, int, int, QImage)
+    tile_failed = pyqtSignal(int, int, int)
+    render_finished = pyqtSignal(object)
+
+    def __init__(self, mapping_utility):
+        super().__init__()
+        self.mapping_utility = mapping_utility
+        self.tile_store = mapping_utility.tile_store
+        self.running = True
+        self.condition = threading.Condition()
+        self.tile_generation = 0
+        self.render_generation = 0
+        self.tile_request = None
+        self.render_request = None
+
+    def request_tiles(self, tiles):
+        """Replace any pending tile request with this list of (z, x, y), loaded in order"""
+        with self.condition:
+            self.tile_generation += 1
+            self.tile_request = (self.tile_generation, list(tiles))
+            self.condition.notify()
+
+    def request_render(self, lat, lon, zoom, red_markers, export_path=None):
+        """Queue a map snapshot render, superseding any render not yet delivered; optionally also save it as PNG"""
+        with self.condition:
+            self.render_generation += 1
+            self.render_request = (self.render_generation, lat, lon, zoom, list(red_markers), export_path)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.tile_request is None and self.render_request is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                tile_request, self.tile_request = self.tile_request, None
+                render_request, self.render_request = self.render_request, None
+            if tile_request is not None:
+                self._load_tiles(*tile_request)
+            if render_request is not None:
+                self._render(*render_request)
+
+    def _load_tiles(self, generation, tiles):
+        for z, x, y in tiles:
+            if not self.running or generation != self.tile_generation:
+                return
+            data = self.tile_store.get_tile(z, x, y)
+            image = QImage()
+            if data is None or not image.loadFromData(data):
+                self.tile_failed.emit(z, x, y)
+                continue
+            self.tile_ready.emit(z, x, y, image)
+
+    def _render(self, generation, lat, lon, zoom, red_markers, export_path):
+        try:
+            image = self.mapping_utility.render_image(lat, lon, zoom, red_markers)
+            if export_path is not None:
+                self.mapping_utility.export_snapshot(image, export_path)
+        except Exception as e:
+            log.error("Render failed: %s", e)
+            return
+        if self.running and generation == self.render_generation:
+            # Passed as a Python object, so the wrapper that pins the pixel buffer travels with it
+            self.render_finished.emit(pil_to_qimage(image))
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.tile_request = None
+            self.render_request = None
+            self.condition.notify()
+        self.wait()
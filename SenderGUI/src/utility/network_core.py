@@ -0,0 +1,188 @@
+import asyncio
+import socket
+import threading
+
+from utility.app_logging import get_logger
+
+log = get_logger("net")
+
+
+class DatagramEndpoint:
+    """A bound UDP socket read by the NetworkCore loop.
+
+    When the socket becomes readable, every queued datagram (up to
+    max_drain) is read into one reusable buffer and passed to
+    on_datagram(data, addr) on the loop thread. Owners hand results to the
+    GUI thread with Qt signals, which Qt queues across threads. on_closed()
+    runs on the loop thread once the socket is closed.
+    """
+
+    def __init__(self, core, sock, on_datagram, on_closed=None, max_datagram=65535, max_drain=512):
+        self.core = core
+        self.sock = sock
+        self.on_datagram = on_datagram
+        self.on_closed = on_closed
+        self.max_drain = max_drain
+        self.buffer = memoryview(bytearray(max_datagram))
+        self.closed = threading.Event()
+
+    def _readable(self):
+        for _ in range(self.max_drain):
+            try:
+                size, addr = self.sock.recvfrom_into(self.buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                log.warning("Receive error: %s", e)
+                return
+            try:
+                self.on_datagram(bytes(self.buffer[:size]), addr)
+            except Exception as e:
+                # One bad packet must not stop the rest of the drain
+                log.exception("Handler error: %s", e)
+
+    def _close(self):
+        if self.closed.is_set():
+            return
+        self.core.endpoints.discard(self)
+        loop = self.core.loop
+        if loop is not None and not loop.is_closed():
+            loop.remove_reader(self.sock)
+        self.sock.close()
+        self.closed.set()
+        if self.on_closed is not None:
+            self.on_closed()
+
+    def close(self):
+        """Stop reading and close the socket; safe to call from any thread"""
+        if self.closed.is_set():
+            return
+        loop = self.core.loop
+        if loop is None or loop.is_closed():
+            self._close()
+        else:
+            loop.call_soon_threadsafe(self._close)
+
+    def wait(self, timeout=1.0):
+        return self.closed.wait(timeout)
+
+
+class NetworkCore:
+    """One asyncio event loop that hosts every UDP endpoint of the dashboard.
+
+    The loop runs on a single background thread, started on first use, so the
+    GUI thread never blocks on a socket and there is no thread per socket.
+    Receivers register with open_endpoint(); sends go through send(), which
+    only queues the datagram to the loop. Closing an endpoint or shutting the
+    core down takes effect immediately instead of waiting out a recv timeout.
+    """
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.outbound = None
+        self.endpoints = set()
+        self.sent = 0
+        self.send_errors = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            ready = threading.Event()
+            self.thread = threading.Thread(target=self._run, args=(ready,), name="network-core", daemon=True)
+            self.thread.start()
+            ready.wait()
+
+    def _run(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            # Close whatever is still open so every owner sees connection_lost
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            for endpoint in list(self.endpoints):
+                endpoint._close()
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+            self.loop = None
+            if self.outbound is not None:
+                self.outbound.close()
+                self.outbound = None
+
+    def call_soon(self, callback, *args):
+        """Run callback(*args) on the loop thread"""
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_later(self, delay, callback, *args):
+        """Schedule callback(*args) on the loop; call from the loop thread only"""
+        return self.loop.call_later(delay, callback, *args)
+
+    def open_endpoint(self, on_datagram, local_addr, on_closed=None, broadcast=False, recv_buffer=None):
+        """Bind a UDP socket at local_addr and feed its datagrams to on_datagram on the loop thread.
+
+        Bind errors are raised here, on the calling thread.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if broadcast:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            if recv_buffer:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer)
+            sock.bind(local_addr)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        endpoint = DatagramEndpoint(self, sock, on_datagram, on_closed)
+        self.call_soon(self._register, endpoint)
+        return endpoint
+
+    def _register(self, endpoint):
+        if endpoint.closed.is_set():
+            return
+        self.endpoints.add(endpoint)
+        self.loop.add_reader(endpoint.sock, endpoint._readable)
+
+    def send(self, data, addr):
+        """Queue one datagram to addr (ip, port) without blocking the caller"""
+        self.call_soon(self._send, data, addr)
+
+    def _send(self, data, addr):
+        if self.outbound is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.setblocking(False)
+            self.outbound = sock
+        try:
+            self.outbound.sendto(data, addr)
+            self.sent += 1
+        except OSError as e:
+            # Full send buffer or unreachable host: drop, as UDP would anyway
+            self.send_errors += 1
+            log.warning("Send to %s:%s failed: %s", addr[0], addr[1], e)
+
+    def stats(self):
+        return {"sent": self.sent, "send_errors": self.send_errors, "endpoints": len(self.endpoints)}
+
+    def shutdown(self, timeout=1.0):
+        with self.lock:
+            thread, loop = self.thread, self.loop
+            self.thread = None
+        if thread is None or loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
@@ -1,18 +1,36 @@
-import socket
 import json
+import os
 
+from utility.network_core import NetworkCore
+from utility.app_logging import get_logger
+
+log = get_logger("mission")
+
+# Where mission commands go: the Orin's IP and port unless overridden as host:port in this variable
+# (e.g. 127.0.0.1:5006 for load_generator.py mission-receiver)
+MISSION_TARGET_ENV = "SENDER_GUI_MISSION_TARGET"
+DEFAULT_MISSION_TARGET = ("192.168.1.116", 5006)
 
-def send_udp_data(data_dict, ip="192.168.1.116", port=5006): #this is orin's ip and orin' port 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    message = json.dumps(data_dict).encode('utf-8')
 
+def mission_target():
+    """(ip, port) mission commands are sent to"""
+    value = os.environ.get(MISSION_TARGET_ENV)
+    if not value:
+        return DEFAULT_MISSION_TARGET
+    host, _, port = value.rpartition(":")
     try:
-        host_name = socket.gethostname()
-        # Resolve the hostname to an IPv4 address
-        # Note: This might return the loopback address (127.0.0.1) in some configurations
-        host_ip = socket.gethostbyname(host_name)
-        print(host_ip)
-        sock.sendto(message, (ip, port))
-        print(f"Sent: {data_dict} to {ip}:{port}")
-    finally:
-        sock.close()
+        return host or DEFAULT_MISSION_TARGET[0], int(port)
+    except ValueError:
+        log.warning("Ignoring %s=%r, expected host:port", MISSION_TARGET_ENV, value)
+        return DEFAULT_MISSION_TARGET
+
+
+def send_udp_data(data_dict, ip=None, port=None):
+    if ip is None or port is None:
+        default_ip, default_port = mission_target()
+        ip = default_ip if ip is None else ip
+        port = default_port if port is None else port
+    message = json.dumps(data_dict).encode('utf-8')
+    # Queued to the network loop, so the GUI thread never blocks on the socket
+    NetworkCore.instance().send(message, (ip, port))
+    log.info("Sent %s to %s:%s", data_dict, ip, port)
@@ -0,0 +1,173 @@
+import time
+from collections import OrderedDict
+from math import pi, log, tan, cos, atan, sinh, floor
+
+import numpy as np
+from PyQt6.QtCore import QRect, QRectF
+from PyQt6.QtGui import QColor
+
+TILE_SIZE = 256
+BACKGROUND_COLOR = QColor(224, 224, 224)
+
+
+def lat_lon_to_world(lat, lon, zoom):
+    """Project lat/lon to Web Mercator world pixels at the given zoom"""
+    scale = (2 ** zoom) * TILE_SIZE
+    x = (lon + 180) / 360 * scale
+    y = ((1 - log(tan(lat * pi / 180) + 1 / cos(lat * pi / 180)) / pi) / 2) * scale
+    return x, y
+
+
+def world_to_lat_lon(x, y, zoom):
+    scale = (2 ** zoom) * TILE_SIZE
+    lon = x / scale * 360 - 180
+    lat = atan(sinh(pi * (1 - 2 * y / scale))) * 180 / pi
+    return lat, lon
+
+
+def project_normalized(lats, lons):
+    """Vectorised Web Mercator projection to zoom-independent world units in [0, 1]"""
+    lat_radians = np.radians(np.asarray(lats, dtype=np.float64))
+    x = (np.asarray(lons, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.arcsinh(np.tan(lat_radians)) / np.pi) / 2.0
+    return x, y
+
+
+class MercatorProjection:
+    """Web Mercator projection with the view center and zoom scale worked out once per view change.
+
+    Points can be kept in normalized world units (see project_normalized), so
+    moving or zooming the view only rescales and offsets them.
+    """
+
+    def __init__(self):
+        self.zoom = None
+        self.scale = 0.0
+        self.center_x = 0.0
+        self.center_y = 0.0
+
+    def set_view(self, center_lat, center_lon, zoom):
+        self.zoom = zoom
+        self.scale = float((1 << zoom) * TILE_SIZE)
+        self.center_x, self.center_y = lat_lon_to_world(center_lat, center_lon, zoom)
+
+    def to_pixel(self, lat, lon, width, height):
+        """Project one point to pixels in a width x height view centred on the view center"""
+        point_x = (lon + 180) / 360 * self.scale
+        point_y = ((1 - log(tan(lat * pi / 180) + 1 / cos(lat * pi / 180)) / pi) / 2) * self.scale
+        return width / 2 + (point_x - self.center_x), height / 2 + (point_y - self.center_y)
+
+    def normalized_to_pixels(self, x, y, width, height, offset_x=0.0, offset_y=0.0):
+        """Map arrays of normalized world coordinates to view pixels in one pass"""
+        pixel_x = x * self.scale + (width / 2 - self.center_x + offset_x)
+        pixel_y = y * self.scale + (height / 2 - self.center_y + offset_y)
+        return pixel_x, pixel_y
+
+
+class TilePixmapCache:
+    """In-memory LRU of decoded 256px tile pixmaps.
+
+    compose() blits only the tiles covering the requested view, so panning and
+    zooming cost a handful of drawPixmap calls instead of a full map render.
+    It never loads tiles itself: tiles it could not draw are collected in
+    missing for a background loader, and are filled in from a neighbouring
+    zoom level in the meantime.
+    """
+
+    def __init__(self, max_tiles=512, retry_after=30.0):
+        self.max_tiles = max_tiles
+        self.retry_after = retry_after
+        self.pixmaps = OrderedDict()
+        self.failed = {}
+        self.pending = set()
+        self.missing = []
+
+    def cached(self, z, x, y):
+        pixmap = self.pixmaps.get((z, x, y))
+        if pixmap is not None:
+            self.pixmaps.move_to_end((z, x, y))
+        return pixmap
+
+    def insert(self, z, x, y, pixmap):
+        self.pixmaps[(z, x, y)] = pixmap
+        self.pixmaps.move_to_end((z, x, y))
+        self.failed.pop((z, x, y), None)
+        self.pending.discard((z, x, y))
+        while len(self.pixmaps) > self.max_tiles:
+            self.pixmaps.popitem(last=False)
+
+    def mark_failed(self, z, x, y):
+        self.failed[(z, x, y)] = time.monotonic()
+        self.pending.discard((z, x, y))
+
+    def recently_failed(self, z, x, y):
+        failed_at = self.failed.get((z, x, y))
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_after
+
+    def take_new_missing(self):
+        """Return the tiles the last compose() lacked if any of them is not already being loaded"""
+        missing = self.missing
+        self.missing = []
+        if not missing or set(missing) <= self.pending:
+            return []
+        self.pending = set(missing)
+        return missing
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.failed.clear()
+        self.pending.clear()
+
+    def compose(self, painter, center_x, center_y, zoom, width, height):
+        """Draw the tiles covering a width x height view centred on world pixel (center_x, center_y)"""
+        left = int(round(center_x - width / 2))
+        top = int(round(center_y - height / 2))
+        half_tile = TILE_SIZE / 2
+        first_x = floor(left / TILE_SIZE)
+        last_x = floor((left + width - 1) / TILE_SIZE)
+        first_y = floor(top / TILE_SIZE)
+        last_y = floor((top + height - 1) / TILE_SIZE)
+        n = 1 << zoom
+        missing = []
+        painter.fillRect(QRect(0, 0, width, height), BACKGROUND_COLOR)
+        for tile_y in range(first_y, last_y + 1):
+            if tile_y < 0 or tile_y >= n:
+                continue
+            for tile_x in range(first_x, last_x + 1):
+                dest_x = tile_x * TILE_SIZE - left
+                dest_y = tile_y * TILE_SIZE - top
+                wrapped_x = tile_x % n
+                pixmap = self.cached(zoom, wrapped_x, tile_y)
+                if pixmap is not None:
+                    painter.drawPixmap(dest_x, dest_y, pixmap)
+                    continue
+                if not self.recently_failed(zoom, wrapped_x, tile_y):
+                    distance = abs(dest_x + half_tile - width / 2) + abs(dest_y + half_tile - height / 2)
+                    missing.append((distance, (zoom, wrapped_x, tile_y)))
+                if not self._draw_parent(painter, zoom, wrapped_x, tile_y, dest_x, dest_y):
+                    self._draw_children(painter, zoom, wrapped_x, tile_y, dest_x, dest_y)
+        # Load the tiles nearest the view center first
+        missing.sort()
+        self.missing = [tile for _, tile in missing]
+
+    def _draw_parent(self, painter, z, x, y, dest_x, dest_y):
+        """Stand in for a missing tile with the matching quarter of its parent, if it is in memory"""
+        if z == 0:
+            return False
+        parent = self.cached(z - 1, x // 2, y // 2)
+        if parent is None:
+            return False
+        half = TILE_SIZE / 2
+        source = QRectF((x % 2) * half, (y % 2) * half, half, half)
+        painter.drawPixmap(QRectF(dest_x, dest_y, TILE_SIZE, TILE_SIZE), parent, source)
+        return True
+
+    def _draw_children(self, painter, z, x, y, dest_x, dest_y):
+        """Stand in for a missing tile with whichever of its four children are in memory"""
+        half = TILE_SIZE / 2
+        for child_y in (0, 1):
+            for child_x in (0, 1):
+                child = self.cached(z + 1, x * 2 + child_x, y * 2 + child_y)
+                if child is not None:
+                    target = QRectF(dest_x + child_x * half, dest_y + child_y * half, half, half)
+                    painter.drawPixmap(target, child, QRectF(child.rect()))
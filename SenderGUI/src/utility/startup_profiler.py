@@ -0,0 +1,77 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+from utility.app_logging import get_logger
+
+log = get_logger("startup")
+
+
+class StartupProfiler:
+    """Times startup phases and background module imports, and prints a summary against a budget"""
+
+    def __init__(self, origin=None, window_budget_ms=500):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.window_budget_ms = window_budget_ms
+        self.phases = []
+        self.imports = {}
+        self.lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.origin) * 1000
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            with self.lock:
+                self.phases.append((name, (start - self.origin) * 1000, duration))
+
+    def mark(self, name):
+        with self.lock:
+            self.phases.append((name, self.elapsed_ms(), 0.0))
+
+    def preload(self, modules):
+        """Import heavy modules on a background thread so later init phases find them loaded"""
+        def run():
+            for module in modules:
+                start = time.perf_counter()
+                try:
+                    importlib.import_module(module)
+                    duration = (time.perf_counter() - start) * 1000
+                except ImportError as e:
+                    log.warning("Could not preload %s: %s", module, e)
+                    duration = None
+                with self.lock:
+                    self.imports[module] = duration
+        thread = threading.Thread(target=run, name="module-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def window_shown_ms(self):
+        for name, at, _ in self.phases:
+            if name == "window shown":
+                return at
+        return None
+
+    def report(self):
+        with self.lock:
+            phases = list(self.phases)
+            imports = dict(self.imports)
+        log.info("Phase timings (ms since process start):")
+        for name, at, duration in phases:
+            if duration:
+                log.info("  %-24s at %8.1f  took %8.1f", name, at, duration)
+            else:
+                log.info("  %-24s at %8.1f", name, at)
+        for module, duration in imports.items():
+            text = "failed" if duration is None else f"{duration:8.1f}"
+            log.info("  import %-17s took %s", module, text)
+        shown = self.window_shown_ms()
+        if shown is not None:
+            verdict = "within" if shown <= self.window_budget_ms else "OVER"
+            log.info("Window shown after %.1f ms (%s %s ms budget)", shown, verdict, self.window_budget_ms)
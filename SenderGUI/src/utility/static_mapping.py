@@ -1,7 +1,14 @@
 import os
+from io import BytesIO
 import staticmap
+import PIL.Image
 import PIL.ImageDraw
 
+from utility.tile_store import TileStore, DEFAULT_TILE_URL
+from utility.app_logging import get_logger
+
+log = get_logger("map")
+
 # Fix for PIL.ImageDraw compatibility
 if not hasattr(PIL.ImageDraw.ImageDraw, 'textsize'):
     def textsize(self, text, font=None, *args, **kwargs):
@@ -9,8 +16,38 @@ if not hasattr(PIL.ImageDraw.ImageDraw, 'textsize'):
         return bbox[2] - bbox[0], bbox[3] - bbox[1]
     PIL.ImageDraw.ImageDraw.textsize = textsize
 
+
+_blank_tile = None
+
+
+def blank_tile_bytes():
+    """Grey placeholder drawn where a tile is neither cached nor fetchable"""
+    global _blank_tile
+    if _blank_tile is None:
+        buffer = BytesIO()
+        PIL.Image.new("RGBA", (256, 256), (224, 224, 224, 255)).save(buffer, format="PNG")
+        _blank_tile = buffer.getvalue()
+    return _blank_tile
+
+
+class CachedStaticMap(staticmap.StaticMap):
+    """StaticMap that pulls its tiles from a TileStore instead of requesting them directly"""
+
+    def __init__(self, width, height, tile_store):
+        # The url is only used as a z/x/y key that get() hands to the tile store
+        super().__init__(width, height, url_template="{z}/{x}/{y}")
+        self.tile_store = tile_store
+
+    def get(self, url, **kwargs):
+        z, x, y = (int(part) for part in url.split("/"))
+        data = self.tile_store.get_tile(z, x, y)
+        if data is None:
+            return 200, blank_tile_bytes()
+        return 200, data
+
+
 class MappingUtility:
-    def __init__(self, lat, lon, zoom=15):
+    def __init__(self, lat, lon, zoom=15, tile_url=DEFAULT_TILE_URL, allow_fetch=True, tile_store=None):
         super().__init__()
         self.max_height = 1000
         self.max_width = 1200
@@ -24,12 +61,21 @@ class MappingUtility:
         assets_dir = os.path.join(self.project_dir, "assets")
         if not os.path.exists(assets_dir):
             os.makedirs(assets_dir)
-            print(f"Created assets directory: {assets_dir}")
+            log.info("Created assets directory: %s", assets_dir)
         
         self.tiles_cache_dir = os.path.join(assets_dir, "tiles")
         if not os.path.exists(self.tiles_cache_dir):
             os.makedirs(self.tiles_cache_dir)
-            print(f"Created tiles cache directory: {self.tiles_cache_dir}")
+            log.info("Created tiles cache directory: %s", self.tiles_cache_dir)
+
+        # Persistent tile cache, shared by every render
+        if tile_store is None:
+            tile_store = TileStore(
+                os.path.join(self.tiles_cache_dir, "tiles.mbtiles"),
+                url_template=tile_url,
+                allow_fetch=allow_fetch
+            )
+        self.tile_store = tile_store
         
         # Store current position
         self.lat = lat
@@ -39,62 +85,71 @@ class MappingUtility:
         # Store red markers separately
         self.red_markers = []
         
-        # Output path
+        # Default path for exported snapshots; renders themselves stay in memory
         self.output_path = os.path.join(assets_dir, "live_map.png")
-        
-        # Only render if map doesn't exist
-        if not self.map_exists():
-            self.render_map()
 
     def map_exists(self):
         return os.path.exists(self.output_path)
 
     def render_map(self):
-        """Render the map with current position and all markers, using url_template only."""
-        self.context = staticmap.StaticMap(
-            self.max_width,
-            self.max_height,
-            url_template='http://a.tile.osm.org/{z}/{x}/{y}.png'
-        )
-
-        print(f"Creating map centered at: {self.lat}, {self.lon} (zoom: {self.zoom})")
-        self.center_marker = staticmap.CircleMarker((self.lon, self.lat), 'blue', 12)
-        self.context.add_marker(self.center_marker)
-        if self.red_markers:
-            print(f"Adding {len(self.red_markers)} red waypoint markers")
-            for marker_lat, marker_lon in self.red_markers:
+        """Render the map with current position and all markers and return it as a PIL image."""
+        return self.render_image(self.lat, self.lon, self.zoom, self.red_markers)
+
+    def render_image(self, lat, lon, zoom, red_markers):
+        """Render the given view in memory without reading utility state, so it can run off the GUI thread."""
+        context = CachedStaticMap(self.max_width, self.max_height, self.tile_store)
+
+        log.debug("Creating map centered at: %s, %s (zoom: %s)", lat, lon, zoom)
+        context.add_marker(staticmap.CircleMarker((lon, lat), 'blue', 12))
+        if red_markers:
+            log.debug("Adding %d red waypoint markers", len(red_markers))
+            for marker_lat, marker_lon in red_markers:
                 marker = staticmap.CircleMarker((marker_lon, marker_lat), 'red', 10)
-                self.context.add_marker(marker)
+                context.add_marker(marker)
         try:
-            image = self.context.render(zoom=self.zoom, center=(self.lon, self.lat))
-            image.save(self.output_path)
-            print(f"Map saved to: {self.output_path}")
+            return context.render(zoom=zoom, center=(lon, lat))
         except Exception as e:
-            print(f"Error rendering map: {e}")
+            log.error("Error rendering map: %s", e)
             raise
 
+    def export_snapshot(self, image=None, path=None):
+        """Write a rendered map (the current view if none is given) to disk as PNG and return the path."""
+        if image is None:
+            image = self.render_map()
+        if path is None:
+            path = self.output_path
+        # Write next to the target and swap in, so readers never see a half-written file
+        temp_path = path + ".tmp"
+        image.save(temp_path, format="PNG")
+        os.replace(temp_path, path)
+        log.info("Map saved to: %s", path)
+        return path
+
     def update_position(self, lat, lon):
         """Update current GPS position and re-render only if changed"""
         if (self.lat, self.lon) != (lat, lon):
-            print(f"Updating map center to: {lat}, {lon}")
+            log.debug("Updating map center to: %s, %s", lat, lon)
             self.lat = lat
             self.lon = lon
             self.render_map()
         else:
-            print("Position unchanged, not regenerating map.")
+            log.debug("Position unchanged, not regenerating map.")
 
-    def add_markers(self, marker_list=None):
-        """Add/update destination markers (red waypoints) only if changed"""
+    def add_markers(self, marker_list=None, render=True):
+        """Add/update destination markers (red waypoints) only if changed; returns True if they changed"""
         if marker_list:
             new_markers = [(float(lat), float(lon)) for lat, lon in marker_list]
             if new_markers != self.red_markers:
-                print(f"Updating waypoint markers: {len(marker_list)} markers")
+                log.debug("Updating waypoint markers: %d markers", len(marker_list))
                 self.red_markers = new_markers
-                self.render_map()
+                if render:
+                    self.render_map()
+                return True
             else:
-                print("Markers unchanged, not regenerating map.")
+                log.debug("Markers unchanged, not regenerating map.")
         else:
-            print("No markers to add (marker_list is empty)")
+            log.debug("No markers to add (marker_list is empty)")
+        return False
     
     def get_map_path(self):
         return self.output_path
\ No newline at end of file
@@ -1,20 +1,23 @@
-import socket
 import threading
 
+from utility.network_core import NetworkCore
+from utility.app_logging import get_logger
+
+log = get_logger("teensy")
+
 class TeensySender:
     def __init__(self, ip="192.168.1.177", port=8888):
         self.ip = ip
         self.port = port
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.core = NetworkCore.instance()
         self.lock = threading.Lock()
 
     def send(self, cmd: str):
         with self.lock:
-            try:
-                print(f"[TeensySender] Sending '{cmd}' to {self.ip}:{self.port}")
-                self.sock.sendto(cmd.encode(), (self.ip, self.port))
-            except Exception as e:
-                print(f"[TeensySender] send failed: {e}")
+            target = (self.ip, self.port)
+        log.debug("Sending %r to %s:%s", cmd, target[0], target[1])
+        # Non-blocking: the datagram goes out on the network loop
+        self.core.send(cmd.encode(), target)
 
     def send_speed(self, value: int):
         self.send(f"SPEED {value}")
@@ -22,4 +25,4 @@ class TeensySender:
     def set_target(self, ip: str, port: int):
         with self.lock:
             self.ip = ip
-            self.port = port
\ No newline at end of file
+            self.port = port
@@ -0,0 +1,46 @@
+import struct
+
+FRAME_MAGIC = b"SGTF"
+FRAME_VERSION = 1
+# magic, version, flags, vehicle_id, seq, timestamp (s since epoch), lat, lon, heading (deg), speed (m/s), mission_state
+FRAME = struct.Struct("<4sBBHIdddffi")
+NO_MISSION_STATE = -1
+# vehicle_id 0 means the sender did not set one (single-vehicle senders leave it 0)
+NO_VEHICLE_ID = 0
+
+
+def is_binary_frame(data):
+    return data[:4] == FRAME_MAGIC
+
+
+def encode_frame(seq, timestamp, lat, lon, heading=float("nan"), speed=float("nan"),
+                 mission_state=NO_MISSION_STATE, vehicle_id=NO_VEHICLE_ID):
+    return FRAME.pack(FRAME_MAGIC, FRAME_VERSION, 0, vehicle_id, seq & 0xFFFFFFFF, timestamp,
+                      lat, lon, heading, speed, mission_state)
+
+
+def decode_frame(data):
+    """Decode a binary telemetry frame into its fields dict.
+
+    Raises ValueError for a truncated frame or a version this build does not
+    know. Bytes after the fixed layout are ignored, so later versions can
+    append fields without breaking older dashboards.
+    """
+    if len(data) < FRAME.size:
+        raise ValueError(f"binary telemetry frame too short ({len(data)} bytes)")
+    _, version, _, vehicle_id, seq, timestamp, lat, lon, heading, speed, mission_state = FRAME.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"unsupported binary telemetry version {version}")
+    fields = {
+        "seq": seq,
+        "timestamp": timestamp,
+        "lat": lat,
+        "lon": lon,
+        "heading": heading,
+        "speed": speed,
+    }
+    if mission_state != NO_MISSION_STATE:
+        fields["mission_state"] = mission_state
+    if vehicle_id != NO_VEHICLE_ID:
+        fields["vehicle_id"] = vehicle_id
+    return fields
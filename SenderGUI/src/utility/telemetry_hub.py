@@ -0,0 +1,150 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+from utility.listen_to_udp import UDPListener, TelemetryBatch
+from utility.link_stats import LinkStats
+
+# Topics a component can subscribe to. Any other name is taken as a telemetry
+# field (e.g. "mission_state") and the callback gets that field's latest value.
+TOPIC_BATCH = "batch"  # the TelemetryBatch itself; by_vehicle() splits it per vehicle ID
+TOPIC_FIXES = "fixes"  # list of (lat, lon, timestamp), every fix of every vehicle in arrival order
+TOPIC_GPS = "gps"      # lat, lon of the latest fix
+TOPIC_RAW = "raw"      # dict of the latest value of every field
+
+
+class Subscription:
+    """One callback on one topic, optionally limited to max_rate calls per second.
+
+    When limited, updates arriving too soon are held back and the newest one
+    is delivered as soon as the interval allows; fixes and batches held back
+    are accumulated instead, so none are lost. A held-back batch is merged
+    into a copy owned by the subscription, never into the published batch
+    that other subscribers receive too.
+    """
+
+    def __init__(self, topic, callback, max_rate=None):
+        self.topic = topic
+        self.callback = callback
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.last_delivery = 0.0
+        self.pending = None
+        self.timer = None
+
+    def offer(self, args):
+        if not self.min_interval:
+            self.callback(*args)
+            return
+        if self.pending is not None and self.topic in (TOPIC_FIXES, TOPIC_BATCH):
+            if self.topic == TOPIC_FIXES:
+                args = (self.pending[0] + args[0],)
+            else:
+                self.pending[0].merge(args[0])
+                args = self.pending
+        wait = self.last_delivery + self.min_interval - time.monotonic()
+        if wait <= 0:
+            self.pending = None
+            self._deliver(args)
+            return
+        if self.topic == TOPIC_BATCH and self.pending is None:
+            owned = TelemetryBatch()
+            owned.merge(args[0])
+            args = (owned,)
+        self.pending = args
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self._flush)
+        if not self.timer.isActive():
+            self.timer.start(int(wait * 1000) + 1)
+
+    def _flush(self):
+        args, self.pending = self.pending, None
+        if args is not None:
+            self._deliver(args)
+
+    def _deliver(self, args):
+        self.last_delivery = time.monotonic()
+        self.callback(*args)
+
+    def cancel(self):
+        self.pending = None
+        if self.timer is not None:
+            self.timer.stop()
+
+
+class TelemetryHub(QObject):
+    """Process-wide owner of the telemetry sources.
+
+    Each UDP port is bound by exactly one UDPListener, however many components
+    want its data, and every packet is parsed once. Components subscribe to a
+    topic instead of opening their own socket; callbacks run on the GUI
+    thread. A TelemetryReplay can be added as a source in place of the socket.
+    link_stats traces the live link's packets from receive to paint.
+    """
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self.sources = {}
+        self.subscriptions = []
+        self.link_stats = LinkStats()
+
+    def open_udp(self, ip="0.0.0.0", port=5005, recorder=None):
+        """Start listening on port, or return the listener that already owns it"""
+        if port in self.sources:
+            return self.sources[port]
+        listener = UDPListener(ip=ip, port=port, recorder=recorder, link_stats=self.link_stats)
+        self.add_source(listener, key=port)
+        listener.start()
+        return listener
+
+    def add_source(self, source, key=None):
+        """Publish the batch_received signal of source (UDPListener, TelemetryReplay) to subscribers"""
+        source.batch_received.connect(self.publish)
+        self.sources[key if key is not None else id(source)] = source
+        return source
+
+    def subscribe(self, topic, callback, max_rate=None):
+        subscription = Subscription(topic, callback, max_rate)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.cancel()
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def publish(self, batch):
+        fix = batch.latest_fix()
+        for subscription in list(self.subscriptions):
+            topic = subscription.topic
+            if topic == TOPIC_BATCH:
+                args = (batch,)
+            elif topic == TOPIC_FIXES:
+                args = (list(batch.fixes),) if batch.fixes else None
+            elif topic == TOPIC_GPS:
+                args = (fix[0], fix[1]) if fix is not None else None
+            elif topic == TOPIC_RAW:
+                args = (dict(batch.fields),) if batch.fields else None
+            else:
+                args = (batch.fields[topic],) if topic in batch.fields else None
+            if args is not None:
+                subscription.offer(args)
+
+    def stats(self):
+        return {key: source.stats() for key, source in self.sources.items() if hasattr(source, "stats")}
+
+    def shutdown(self):
+        for subscription in self.subscriptions:
+            subscription.cancel()
+        for source in self.sources.values():
+            source.stop()
+            source.wait()
+        self.sources.clear()
@@ -0,0 +1,228 @@
+import os
+import struct
+import threading
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from utility.listen_to_udp import parse_packet, PendingBatch, TelemetryBatch
+from utility.app_logging import get_logger
+
+log = get_logger("telemetry")
+
+FILE_MAGIC = b"SGTLM001"
+RECORD_HEADER = struct.Struct("<dI")  # receive timestamp (s), payload length
+
+
+class TelemetryRecorder:
+    """Append-only binary log of raw telemetry datagrams with their receive time.
+
+    The file starts with FILE_MAGIC, followed by records of RECORD_HEADER and
+    the payload bytes exactly as they came off the socket.
+    """
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if is_new:
+            self.file.write(FILE_MAGIC)
+        self.last_flush = time.monotonic()
+
+    def record(self, payload, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(RECORD_HEADER.pack(timestamp, len(payload)))
+            self.file.write(payload)
+            self.count += 1
+            now = time.monotonic()
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+class TelemetryLogReader:
+    """Random access to a recorded telemetry log through an in-memory record index"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        if self.file.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a telemetry log")
+        self.offsets = []
+        self.timestamps = []
+        self._build_index()
+
+    def _build_index(self):
+        offset = len(FILE_MAGIC)
+        while True:
+            self.file.seek(offset)
+            header = self.file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break
+            timestamp, length = RECORD_HEADER.unpack(header)
+            self.offsets.append(offset)
+            self.timestamps.append(timestamp)
+            offset += RECORD_HEADER.size + length
+        # A record cut short by a crash is dropped rather than replayed
+        self.file.seek(0, os.SEEK_END)
+        if self.offsets and offset > self.file.tell():
+            self.offsets.pop()
+            self.timestamps.pop()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def read(self, index):
+        """Return (timestamp, payload) of record number index"""
+        self.file.seek(self.offsets[index])
+        timestamp, length = RECORD_HEADER.unpack(self.file.read(RECORD_HEADER.size))
+        return timestamp, self.file.read(length)
+
+    def index_at_time(self, seconds):
+        """Index of the first record at or after the given offset from the start of the log"""
+        if not self.timestamps:
+            return 0
+        target = self.timestamps[0] + seconds
+        lo, hi = 0, len(self.timestamps)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[mid] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def duration(self):
+        if not self.timestamps:
+            return 0.0
+        return self.timestamps[-1] - self.timestamps[0]
+
+    def close(self):
+        self.file.close()
+
+
+class TelemetryReplay(QThread):
+    """Plays a recorded telemetry log back through the same signals as UDPListener.
+
+    speed is a multiple of real time (1.0, 10.0, 100.0, ...); 0 or None
+    replays as fast as records can be parsed. seek() jumps to a record index
+    or to a time offset while playing. As in UDPListener, packets are
+    gathered into one TelemetryBatch per frame_interval, at most one batch
+    waits for the GUI thread (later ones merge into it, keeping the newest
+    max_pending_fixes fixes) and the signals are emitted once per delivery,
+    so a fast replay loads the UI the way a fast link would.
+    """
+    gps_data_received = pyqtSignal(float, float)
+    data_received = pyqtSignal(dict)
+    batch_received = pyqtSignal(object)
+    finished_replay = pyqtSignal()
+    _batch_ready = pyqtSignal()
+
+    def __init__(self, path, speed=1.0, loop=False, frame_interval=1 / 60, max_pending_fixes=4096):
+        super().__init__()
+        self.reader = TelemetryLogReader(path)
+        self.speed = speed
+        self.loop = loop
+        self.frame_interval = frame_interval
+        self.running = True
+        self.position = 0
+        self.lock = threading.Lock()
+        self._seek_to = None
+        self.ready = PendingBatch(max_pending_fixes)
+        self.replayed = 0
+        self.malformed = 0
+        # This QThread object lives on the GUI thread, so the notification is queued there
+        self._batch_ready.connect(self._deliver)
+
+    def seek(self, index=None, seconds=None):
+        if seconds is not None:
+            index = self.reader.index_at_time(seconds)
+        with self.lock:
+            self._seek_to = max(0, min(int(index), len(self.reader)))
+
+    def run(self):
+        log.info("Replaying %d telemetry packets from %s", len(self.reader), self.reader.path)
+        base_wall = time.monotonic()
+        base_stamp = None
+        pending = TelemetryBatch()
+        next_delivery = time.monotonic() + self.frame_interval
+        while self.running:
+            if pending.packets and time.monotonic() >= next_delivery:
+                self._publish(pending)
+                pending = TelemetryBatch()
+                next_delivery = time.monotonic() + self.frame_interval
+            with self.lock:
+                if self._seek_to is not None:
+                    self.position = self._seek_to
+                    self._seek_to = None
+                    base_stamp = None
+            if self.position >= len(self.reader):
+                if not self.loop:
+                    break
+                self.position = 0
+                base_stamp = None
+            timestamp, payload = self.reader.read(self.position)
+            if base_stamp is None:
+                base_wall = time.monotonic()
+                base_stamp = timestamp
+            if self.speed:
+                delay = base_wall + (timestamp - base_stamp) / self.speed - time.monotonic()
+                if delay > 0:
+                    # Sleep in short slices so stop(), seek() and batch delivery take effect promptly
+                    wake = min(delay, 0.05)
+                    if pending.packets:
+                        wake = min(wake, max(0.0, next_delivery - time.monotonic()))
+                    time.sleep(wake)
+                    continue
+            self.position += 1
+            self.replayed += 1
+            try:
+                fields, gps = parse_packet(payload)
+            except (UnicodeDecodeError, ValueError, TypeError, KeyError):
+                self.malformed += 1
+                continue
+            pending.add_packet(fields, gps, timestamp, time.monotonic())
+        if pending.packets:
+            self._publish(pending)
+        self.reader.close()
+        log.info("Telemetry replay stopped")
+        self.finished_replay.emit()
+
+    def _publish(self, batch):
+        if self.ready.put(batch):
+            self._batch_ready.emit()
+
+    def _deliver(self):
+        # GUI thread
+        batch = self.ready.take()
+        if batch is None:
+            return
+        self.batch_received.emit(batch)
+        if batch.fields:
+            self.data_received.emit(dict(batch.fields))
+        fix = batch.latest_fix()
+        if fix is not None:
+            self.gps_data_received.emit(fix[0], fix[1])
+
+    def stats(self):
+        return {"replayed": self.replayed, "malformed": self.malformed, **self.ready.stats()}
+
+    def stop(self):
+        self.running = False
@@ -0,0 +1,204 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from math import radians, cos, sin, hypot, ceil
+
+from PyQt6.QtCore import QThread
+
+from utility.slippy_map import TILE_SIZE, lat_lon_to_world
+from utility.app_logging import get_logger
+
+log = get_logger("tiles")
+
+EARTH_METERS_PER_DEGREE = 111320.0
+
+
+def corridor_tiles(points, zoom, radius=1):
+    """Tiles within radius tiles of the polyline through points (lat, lon), in order along the line"""
+    n = 1 << zoom
+    tiles = []
+    seen = set()
+
+    def add(world_x, world_y):
+        tile_x = int(world_x // TILE_SIZE)
+        tile_y = int(world_y // TILE_SIZE)
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                y = tile_y + dy
+                if 0 <= y < n:
+                    tile = (zoom, (tile_x + dx) % n, y)
+                    if tile not in seen:
+                        seen.add(tile)
+                        tiles.append(tile)
+
+    world = [lat_lon_to_world(lat, lon, zoom) for lat, lon in points]
+    if len(world) == 1:
+        add(*world[0])
+    for (x0, y0), (x1, y1) in zip(world, world[1:]):
+        # Half-tile steps so no tile the line crosses is skipped
+        steps = max(1, int(ceil(hypot(x1 - x0, y1 - y0) / (TILE_SIZE / 2))))
+        for i in range(steps + 1):
+            add(x0 + (x1 - x0) * i / steps, y0 + (y1 - y0) * i / steps)
+    return tiles
+
+
+def project_ahead(lat, lon, heading, distance):
+    """Point distance meters from (lat, lon) along heading degrees (flat-earth, fine for a few km)"""
+    north = distance * cos(radians(heading))
+    east = distance * sin(radians(heading))
+    return (
+        lat + north / EARTH_METERS_PER_DEGREE,
+        lon + east / (EARTH_METERS_PER_DEGREE * cos(radians(lat)))
+    )
+
+
+class TilePrefetcher(QThread):
+    """Warms the tile store ahead of the rover along its predicted path and the mission route.
+
+    Each plan lists, nearest first, the tiles around the path the rover is
+    heading along and around the legs to the remaining waypoints, at the
+    current zoom and its neighbours. Tiles already on disk are skipped. A new
+    plan replaces the one being worked on. Downloads are limited to
+    max_concurrency at a time and to max_bytes_per_second on average.
+    """
+
+    def __init__(self, tile_store, max_concurrency=2, max_bytes_per_second=256 * 1024,
+                 max_tiles_per_plan=600, lookahead_seconds=60.0, min_lookahead_meters=200.0):
+        super().__init__()
+        self.tile_store = tile_store
+        self.max_concurrency = max_concurrency
+        self.max_bytes_per_second = max_bytes_per_second
+        self.max_tiles_per_plan = max_tiles_per_plan
+        self.lookahead_seconds = lookahead_seconds
+        self.min_lookahead_meters = min_lookahead_meters
+        self.running = True
+        self.condition = threading.Condition()
+        self.generation = 0
+        self.plan = None
+
+        self.stats_lock = threading.Lock()
+        self.planned = 0
+        self.already_cached = 0
+        self.prefetched = 0
+        self.failed = 0
+        self.bytes_fetched = 0
+
+    def request_plan(self, lat, lon, route, zoom, motion=None):
+        """Replace the current plan.
+
+        route is the list of (lat, lon) waypoints still to visit and motion the
+        (heading, speed) of the rover, or None while it is not moving.
+        """
+        with self.condition:
+            self.generation += 1
+            self.plan = (self.generation, lat, lon, list(route), zoom, motion)
+            self.condition.notify()
+
+    def build_plan(self, lat, lon, route, zoom, motion):
+        ahead = []
+        if motion is not None:
+            heading, speed = motion
+            distance = max(self.min_lookahead_meters, speed * self.lookahead_seconds)
+            ahead = [(lat, lon), project_ahead(lat, lon, heading, distance)]
+        mission = [(lat, lon)] + route if route else []
+        tiles = []
+        seen = set()
+        for level in (zoom, zoom - 1, zoom + 1):
+            if level < 0 or level > 19:
+                continue
+            for points in (ahead, mission):
+                if not points:
+                    continue
+                for tile in corridor_tiles(points, level):
+                    if tile not in seen:
+                        seen.add(tile)
+                        tiles.append(tile)
+        return tiles[:self.max_tiles_per_plan]
+
+    def run(self):
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            while True:
+                with self.condition:
+                    while self.running and self.plan is None:
+                        self.condition.wait()
+                    if not self.running:
+                        return
+                    plan, self.plan = self.plan, None
+                self._execute(executor, plan)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _execute(self, executor, plan):
+        generation, lat, lon, route, zoom, motion = plan
+        if not self.tile_store.allow_fetch:
+            return
+        tiles = self.build_plan(lat, lon, route, zoom, motion)
+        self.planned += len(tiles)
+        started = time.monotonic()
+        plan_bytes = 0
+        in_flight = set()
+        fetched_before = self.prefetched
+        for tile in tiles:
+            if not self.running or generation != self.generation:
+                break
+            if self.tile_store.has_tile(*tile):
+                self.already_cached += 1
+                continue
+            # Bandwidth budget: wait until the average rate for this plan is back under the cap
+            allowed_at = started + plan_bytes / self.max_bytes_per_second
+            while self.running and time.monotonic() < allowed_at:
+                time.sleep(min(0.1, allowed_at - time.monotonic()))
+            if len(in_flight) >= self.max_concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                plan_bytes += sum(future.result() for future in done)
+            in_flight.add(executor.submit(self._fetch, *tile))
+        if in_flight:
+            done, _ = wait(in_flight)
+            plan_bytes += sum(future.result() for future in done)
+        if self.prefetched > fetched_before:
+            log.info("Prefetched %d tiles (%d KB); %s",
+                     self.prefetched - fetched_before, plan_bytes // 1024, self.format_hit_rate())
+
+    def _fetch(self, z, x, y):
+        data = self.tile_store.fetch_tile(z, x, y)
+        if data is None:
+            with self.stats_lock:
+                self.failed += 1
+            return 0
+        self.tile_store.put_tile(z, x, y, data, prefetched=True)
+        with self.stats_lock:
+            self.prefetched += 1
+            self.bytes_fetched += len(data)
+        return len(data)
+
+    def hit_rate(self):
+        """Share of the tiles the map had to load for the first time that the prefetcher had already fetched"""
+        used = self.tile_store.prefetch_used
+        demand_misses = self.tile_store.misses
+        if used + demand_misses == 0:
+            return None
+        return used / (used + demand_misses)
+
+    def format_hit_rate(self):
+        rate = self.hit_rate()
+        return "hit rate n/a" if rate is None else f"hit rate {rate * 100:.1f}%"
+
+    def stats(self):
+        return {
+            "planned": self.planned,
+            "already_cached": self.already_cached,
+            "prefetched": self.prefetched,
+            "failed": self.failed,
+            "bytes_fetched": self.bytes_fetched,
+            "used": self.tile_store.prefetch_used,
+            "demand_misses": self.tile_store.misses,
+            "hit_rate": self.hit_rate(),
+        }
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.plan = None
+            self.condition.notify()
+        self.wait()
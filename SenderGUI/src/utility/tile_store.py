@@ -0,0 +1,170 @@
+import sqlite3
+import threading
+import time
+
+import requests
+
+from utility.app_logging import get_logger
+
+log = get_logger("tiles")
+
+DEFAULT_TILE_URL = "http://a.tile.osm.org/{z}/{x}/{y}.png"
+
+
+class TileStore:
+    """Persistent z/x/y tile cache in an MBTiles (SQLite) file with LRU eviction.
+
+    Tiles are always served from disk first. Missing tiles are downloaded from
+    url_template only when fetching is allowed, so the store works fully
+    offline once an area has been cached. Point url_template at a local HTTP
+    server to exercise it without internet access.
+    """
+
+    def __init__(self, db_path, url_template=DEFAULT_TILE_URL, max_bytes=256 * 1024 * 1024,
+                 allow_fetch=True, request_timeout=5.0):
+        self.db_path = db_path
+        self.url_template = url_template
+        self.max_bytes = max_bytes
+        self.allow_fetch = allow_fetch
+        self.request_timeout = request_timeout
+        self.headers = {"User-Agent": "SenderGUI/1.0"}
+
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.evicted = 0
+        # Tiles written by the prefetcher this session and not yet read by the map
+        self.prefetched_keys = set()
+        self.prefetch_used = 0
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Standard MBTiles layout (TMS row numbering) plus size/last_access for LRU bookkeeping
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tiles ("
+            "zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB, "
+            "size INTEGER, last_access REAL, "
+            "PRIMARY KEY (zoom_level, tile_column, tile_row))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tiles_last_access ON tiles (last_access)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("INSERT OR IGNORE INTO metadata VALUES ('name', 'SenderGUI tile cache')")
+        self.conn.execute("INSERT OR IGNORE INTO metadata VALUES ('format', 'png')")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    @staticmethod
+    def _tms_row(z, y):
+        return (1 << z) - 1 - y
+
+    def has_tile(self, z, x, y):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, self._tms_row(z, y))
+            ).fetchone()
+        return row is not None
+
+    def read_tile(self, z, x, y):
+        """Return cached tile bytes or None, without touching the network"""
+        key = (z, x, self._tms_row(z, y))
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if key in self.prefetched_keys:
+                self.prefetched_keys.discard(key)
+                self.prefetch_used += 1
+            self.conn.execute(
+                "UPDATE tiles SET last_access=? WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (time.time(),) + key
+            )
+            self.conn.commit()
+        return row[0]
+
+    def get_tile(self, z, x, y, allow_fetch=None):
+        """Return tile bytes from disk, downloading and storing them if missing and allowed"""
+        data = self.read_tile(z, x, y)
+        if data is not None:
+            return data
+        if allow_fetch is None:
+            allow_fetch = self.allow_fetch
+        if not allow_fetch:
+            return None
+        data = self.fetch_tile(z, x, y)
+        if data is not None:
+            self.put_tile(z, x, y, data)
+        return data
+
+    def fetch_tile(self, z, x, y):
+        url = self.url_template.format(z=z, x=x, y=y)
+        try:
+            response = requests.get(url, timeout=self.request_timeout, headers=self.headers)
+        except requests.RequestException as e:
+            log.warning("Fetch failed for %s: %s", url, e)
+            return None
+        if response.status_code != 200 or not response.content:
+            log.warning("Fetch failed for %s: HTTP %s", url, response.status_code)
+            return None
+        with self.lock:
+            self.fetched += 1
+        return response.content
+
+    def put_tile(self, z, x, y, data, prefetched=False):
+        key = (z, x, self._tms_row(z, y))
+        with self.lock:
+            if prefetched:
+                self.prefetched_keys.add(key)
+            old = self.conn.execute(
+                "SELECT size FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?", key
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?)",
+                key + (sqlite3.Binary(data), len(data), time.time())
+            )
+            self.total_bytes += len(data) - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used tiles until the store is back under 90% of the cap"""
+        target = int(self.max_bytes * 0.9)
+        while self.total_bytes > target:
+            rows = self.conn.execute(
+                "SELECT rowid, size, zoom_level, tile_column, tile_row FROM tiles ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                break
+            for rowid, size, z, x, tms_y in rows:
+                self.conn.execute("DELETE FROM tiles WHERE rowid=?", (rowid,))
+                self.prefetched_keys.discard((z, x, tms_y))
+                self.total_bytes -= size
+                self.evicted += 1
+                if self.total_bytes <= target:
+                    break
+
+    def stats(self):
+        with self.lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+            return {
+                "tiles": count,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "fetched": self.fetched,
+                "evicted": self.evicted,
+                "prefetch_used": self.prefetch_used,
+            }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
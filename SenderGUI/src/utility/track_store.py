@@ -0,0 +1,200 @@
+import os
+import time
+from math import radians, degrees, cos, atan2, hypot
+
+import numpy as np
+
+from utility.slippy_map import TILE_SIZE, project_normalized
+
+BLOCK_SIZE = 1024
+
+
+def douglas_peucker(x, y, tolerance):
+    """Return the indices of the points kept by Douglas-Peucker simplification"""
+    n = len(x)
+    if n < 3:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        rel_x = x[start + 1:end] - x[start]
+        rel_y = y[start + 1:end] - y[start]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distance = np.hypot(rel_x, rel_y)
+        else:
+            distance = np.abs(rel_x * dy - rel_y * dx) / length
+        i = int(np.argmax(distance))
+        if distance[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+
+class TrackStore:
+    """GPS track held in preallocated ring-buffer arrays.
+
+    Each fix is stored as lat, lon and timestamp plus its normalized Web
+    Mercator position, so drawing never re-projects. When the ring is full the
+    oldest block is appended to spill_path (float64 lat, lon, timestamp
+    triples) before being overwritten. Once spill_path reaches
+    max_spill_bytes it is rotated to spill_path + ".1", replacing the
+    previous rotation, so a track never takes more than about twice that on
+    disk and keeps its newest history. Rendering goes through
+    simplified_world(), which caches a Douglas-Peucker simplification per
+    zoom level for every completed block, so only the newest partial block is
+    simplified again as fixes arrive.
+    """
+
+    def __init__(self, capacity=256 * BLOCK_SIZE, spill_path=None, pixel_tolerance=0.5,
+                 max_spill_bytes=64 * 1024 * 1024):
+        # Whole blocks only, so a block never wraps around the end of the ring
+        self.capacity = max(BLOCK_SIZE, capacity // BLOCK_SIZE * BLOCK_SIZE)
+        self.spill_path = spill_path
+        self.max_spill_bytes = max_spill_bytes
+        self.pixel_tolerance = pixel_tolerance
+        self.lat = np.empty(self.capacity, dtype=np.float64)
+        self.lon = np.empty(self.capacity, dtype=np.float64)
+        self.timestamp = np.empty(self.capacity, dtype=np.float64)
+        self.world_x = np.empty(self.capacity, dtype=np.float64)
+        self.world_y = np.empty(self.capacity, dtype=np.float64)
+        self.first = 0  # absolute index of the oldest fix held in memory
+        self.total = 0  # absolute index one past the newest fix
+        self.spilled = 0
+        self.spill_rotations = 0
+        self._spill_size = None  # bytes in spill_path, read from disk on the first spill
+        self.simplified = {}
+        # zoom -> (block index, point count, kept indices) of the newest, still growing block
+        self.partial_simplified = {}
+
+    def __len__(self):
+        return self.total - self.first
+
+    def append(self, lat, lon, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if self.total - self.first == self.capacity:
+            self._spill_oldest_block()
+        pos = self.total % self.capacity
+        world_x, world_y = project_normalized(lat, lon)
+        self.lat[pos] = lat
+        self.lon[pos] = lon
+        self.timestamp[pos] = timestamp
+        self.world_x[pos] = world_x
+        self.world_y[pos] = world_y
+        self.total += 1
+
+    def _spill_oldest_block(self):
+        self._spill(self.first, self.first + BLOCK_SIZE)
+        block_index = self.first // BLOCK_SIZE
+        for key in [key for key in self.simplified if key[0] == block_index]:
+            del self.simplified[key]
+        self.first += BLOCK_SIZE
+
+    def _spill(self, start, end):
+        """Append the fixes with absolute indices start..end (within one block) to spill_path"""
+        if self.spill_path is None or end <= start:
+            return
+        pos = start % self.capacity
+        block = slice(pos, pos + end - start)
+        rows = np.column_stack((self.lat[block], self.lon[block], self.timestamp[block]))
+        if self._spill_size is None:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            self._spill_size = os.path.getsize(self.spill_path) if os.path.exists(self.spill_path) else 0
+        if self._spill_size and self._spill_size + rows.nbytes > self.max_spill_bytes:
+            os.replace(self.spill_path, self.spill_path + ".1")
+            self._spill_size = 0
+            self.spill_rotations += 1
+        with open(self.spill_path, "ab") as f:
+            rows.tofile(f)
+        self._spill_size += rows.nbytes
+        self.spilled += end - start
+
+    def load_spilled(self):
+        """Read the history still on disk, oldest first, as an (N, 3) array of lat, lon, timestamp"""
+        parts = []
+        if self.spill_path is not None:
+            for path in (self.spill_path + ".1", self.spill_path):
+                if os.path.exists(path):
+                    parts.append(np.fromfile(path, dtype=np.float64).reshape(-1, 3))
+        if not parts:
+            return np.empty((0, 3), dtype=np.float64)
+        return np.concatenate(parts)
+
+    def latest(self):
+        if self.total == self.first:
+            return None
+        pos = (self.total - 1) % self.capacity
+        return self.lat[pos], self.lon[pos], self.timestamp[pos]
+
+    def motion(self, window=10.0, max_points=256):
+        """Return (heading in degrees, speed in m/s) over the last window seconds, or None if not moving"""
+        count = len(self)
+        if count < 2:
+            return None
+        newest = (self.total - 1) % self.capacity
+        oldest = newest
+        for back in range(1, min(count, max_points)):
+            pos = (self.total - 1 - back) % self.capacity
+            if self.timestamp[newest] - self.timestamp[pos] > window:
+                break
+            oldest = pos
+        if oldest == newest:
+            return None
+        north = (self.lat[newest] - self.lat[oldest]) * 111320.0
+        east = (self.lon[newest] - self.lon[oldest]) * 111320.0 * cos(radians(self.lat[newest]))
+        distance = hypot(north, east)
+        if distance < 0.5:
+            return None
+        elapsed = self.timestamp[newest] - self.timestamp[oldest]
+        speed = distance / elapsed if elapsed > 0 else 0.0
+        return degrees(atan2(east, north)) % 360.0, speed
+
+    def clear(self):
+        """Forget the in-memory track, first appending it to spill_path so no history is lost"""
+        # first is always block aligned, so each slice stays inside one block of the ring
+        for start in range(self.first, self.total, BLOCK_SIZE):
+            self._spill(start, min(start + BLOCK_SIZE, self.total))
+        self.first = self.total = (self.total + BLOCK_SIZE - 1) // BLOCK_SIZE * BLOCK_SIZE
+        self.simplified.clear()
+        self.partial_simplified.clear()
+
+    def _block_world(self, block_index):
+        start = max(block_index * BLOCK_SIZE, self.first)
+        end = min((block_index + 1) * BLOCK_SIZE, self.total)
+        pos = start % self.capacity
+        return self.world_x[pos:pos + end - start], self.world_y[pos:pos + end - start], end - start
+
+    def simplified_world(self, zoom):
+        """Return the in-memory track in normalized world units, simplified for the given zoom"""
+        if self.total == self.first:
+            return np.empty(0), np.empty(0)
+        tolerance = self.pixel_tolerance / ((1 << zoom) * TILE_SIZE)
+        parts_x = []
+        parts_y = []
+        for block_index in range(self.first // BLOCK_SIZE, (self.total - 1) // BLOCK_SIZE + 1):
+            x, y, count = self._block_world(block_index)
+            if count == BLOCK_SIZE:
+                keep = self.simplified.get((block_index, zoom))
+                if keep is None:
+                    keep = douglas_peucker(x, y, tolerance)
+                    self.simplified[(block_index, zoom)] = keep
+            else:
+                # Reused until the next fix arrives, so redraws without new data cost no simplification
+                cached = self.partial_simplified.get(zoom)
+                if cached is not None and cached[0] == block_index and cached[1] == count:
+                    keep = cached[2]
+                else:
+                    keep = douglas_peucker(x, y, tolerance)
+                    self.partial_simplified[zoom] = (block_index, count, keep)
+            parts_x.append(x[keep])
+            parts_y.append(y[keep])
+        return np.concatenate(parts_x), np.concatenate(parts_y)
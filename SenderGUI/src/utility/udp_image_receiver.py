@@ -1,27 +1,61 @@
-import socket
-import threading
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from utility.network_core import NetworkCore
+from utility.image_chunks import FrameAssembler, is_chunk
+from utility.app_logging import get_logger
+
+log = get_logger("camera")
+
 class UDPImageReceiver(QObject):
+    """Receives camera frames on a UDP port and emits each complete JPEG on the GUI thread.
+
+    Senders split each frame into chunks (see utility.image_chunks) that fit
+    the MTU, so frames of any size survive without IP fragmentation; the
+    chunks are reassembled here with a bounded buffer. A datagram without the
+    chunk header is taken as a whole frame, as older senders send them.
+    """
     image_received = pyqtSignal(bytes)
 
-    def __init__(self, ip='0.0.0.0', port=5007):   #here the ip and port will be orin's(receiverside) setting it to 0.0.0.0 means it will hear from all of the available interefaces
+    def __init__(self, ip='0.0.0.0', port=5007, max_frames=8, frame_timeout=0.5):   #here the ip and port will be orin's(receiverside) setting it to 0.0.0.0 means it will hear from all of the available interefaces
         super().__init__()                         #here orins' ip is 192.168.1.116 and port is 5006
         self.ip = ip
         self.port = port
         self.running = False
+        self.endpoint = None
+        self.assembler = FrameAssembler(max_frames=max_frames, timeout=frame_timeout)
+        self.whole_frames = 0
 
     def start(self):
+        # Read on the shared network loop; image_received is queued to the GUI thread
+        try:
+            # A 1080p frame arrives as a burst of a few hundred chunks
+            self.endpoint = NetworkCore.instance().open_endpoint(
+                self.listen, (self.ip, self.port), on_closed=self._on_closed, recv_buffer=4 << 20
+            )
+        except OSError as e:
+            log.error("Failed to bind to port %s: %s", self.port, e)
+            return
         self.running = True
-        threading.Thread(target=self.listen, daemon=True).start()
-
-    def listen(self):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.bind((self.ip, self.port))
-        while self.running:
-            data, _ = sock.recvfrom(65536)  # Adjust buffer size as needed
+
+    def listen(self, data, addr):
+        # Loop thread
+        if not is_chunk(data):
+            self.whole_frames += 1
             self.image_received.emit(data)
+            return
+        frame = self.assembler.add(data)
+        if frame is not None:
+            self.image_received.emit(frame)
+
+    def stats(self):
+        stats = self.assembler.stats()
+        stats["whole_frames"] = self.whole_frames
+        return stats
+
+    def _on_closed(self):
+        log.info("Image receiver on port %s stopped: %s", self.port, self.stats())
 
     def stop(self):
-        self.running = False
\ No newline at end of file
+        self.running = False
+        if self.endpoint is not None:
+            self.endpoint.close()